@@ -5,8 +5,8 @@ import logging
 from datetime import datetime, timedelta
 
 from database import get_db
-from models import Appointment
-from treatment_data import TREATMENT_TYPES
+from models import Appointment, ScheduledEmailContent
+from treatment_data import TREATMENT_TYPES, TREATMENT_DURATIONS, parse_appointment_datetime
 
 router = APIRouter()
 
@@ -33,17 +33,18 @@ async def get_calendar_events(
         
         # Get appointments from database
         db_appointments = db.query(Appointment).filter(
-            Appointment.appointment_date >= start_date.strftime("%Y-%m-%d"),
-            Appointment.appointment_date <= end_date.strftime("%Y-%m-%d")
+            Appointment.appointment_date >= start_date.date(),
+            Appointment.appointment_date <= end_date.date()
         ).all()
         
         # Format events for calendar display
         events = []
         for appointment in db_appointments:
             # Create datetime for start and end
-            appointment_datetime = datetime.strptime(f"{appointment.appointment_date} {appointment.appointment_time}", "%Y-%m-%d %H:%M")
-            treatment_info = TREATMENT_TYPES.get(appointment.treatment_type, {'duration': 30})
-            end_datetime = appointment_datetime + timedelta(minutes=treatment_info['duration'])
+            appointment_datetime = parse_appointment_datetime(appointment.appointment_date, appointment.appointment_time)
+            if appointment_datetime is None:
+                continue
+            end_datetime = appointment_datetime + timedelta(minutes=TREATMENT_DURATIONS.get(appointment.treatment_type, 30))
             
             event = {
                 'id': str(appointment.id),
@@ -238,8 +239,13 @@ async def update_appointment_notes(
         # Update admin notes in database
         admin_notes = notes_data.get('admin_notes', '')
         db_appointment.admin_notes = admin_notes
+        db_appointment.email_context_json = None
+        
+        # Drop pre-generated email content so it is rebuilt with the new notes
+        db.query(ScheduledEmailContent).filter(
+            ScheduledEmailContent.appointment_id == appointment_id
+        ).delete(synchronize_session=False)
         db.commit()
-        db.refresh(db_appointment)
         
         return {
             "message": "Admin notes updated successfully",
@@ -256,7 +262,7 @@ async def update_appointment_notes(
 async def get_admin_stats(db: Session = Depends(get_db)):
     """Get statistics for admin dashboard"""
     try:
-        today = datetime.now().strftime("%Y-%m-%d")
+        today = datetime.now().date()
         
         # Get counts from database
         total_appointments = db.query(Appointment).count()
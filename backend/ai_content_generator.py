@@ -1,9 +1,15 @@
 import os
+import html
 import logging
-from typing import Dict, Optional
-from dataclasses import dataclass
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from dataclasses import asdict, dataclass, replace
+from functools import lru_cache
 from datetime import datetime, timedelta
 from groq import Groq
+from jinja2 import Environment
 from treatment_data import TREATMENT_TYPES
 from clinic_settings_endpoints import get_all_settings_dict
 from database import SessionLocal
@@ -12,6 +18,187 @@ from database import SessionLocal
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Generated emails for appointments without notes differ only in the patient and
+# date fields, so the LLM output is cached per (email_type, treatment_type, status)
+# as a template with placeholders for those fields
+TEMPLATE_CACHE_SIZE = 512
+TEMPLATE_CACHE_TTL = 86400  # seconds
+TEMPLATE_PLACEHOLDER_FIELDS = (
+    'patient_name', 'patient_email', 'patient_phone', 'appointment_date', 'appointment_time'
+)
+
+# Output format appended to every email-writing prompt
+EMAIL_FORMAT_INSTRUCTIONS = """Generate both a subject line and email body in HTML format.
+Return in this format:
+SUBJECT: [subject line]
+BODY: [HTML email body]
+"""
+
+# Fallback email bodies, compiled once at import; only .render() runs per email
+REMINDER_HTML_TEMPLATE = """
+        <html>
+        <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
+            <div style="max-width: 600px; margin: 0 auto; padding: 20px;">
+                <h2 style="color: #2c5aa0;">Appointment Reminder</h2>
+                
+                <p>Dear {{ patient_name }},</p>
+                
+                <p>This is a friendly reminder about your upcoming dental appointment:</p>
+                
+                <div style="background-color: #f8f9fa; padding: 15px; border-radius: 5px; margin: 20px 0;">
+                    <strong>Appointment Details:</strong><br>
+                    <strong>Treatment:</strong> {{ treatment_name }}<br>
+                    <strong>Date:</strong> {{ appointment_date }}<br>
+                    <strong>Time:</strong> {{ appointment_time }}<br>
+                    <strong>Duration:</strong> {{ duration }} minutes<br>
+                    <strong>Doctor:</strong> {{ doctor_name }}
+                </div>
+                
+                <p><strong>Please bring:</strong></p>
+                <ul>
+                    <li>Photo ID</li>
+                    <li>Insurance card</li>
+                    <li>List of current medications</li>
+                    <li>Payment method</li>
+                </ul>
+                
+                <p>If you need to reschedule or cancel, please call us at {{ clinic_phone }} at least 24 hours in advance.</p>
+                
+                <p>We look forward to seeing you tomorrow!</p>
+                
+                <p>Best regards,<br>
+                <strong>{{ clinic_name }}</strong><br>
+                {{ clinic_address }}<br>
+                {{ clinic_phone }}</p>
+            </div>
+        </body>
+        </html>
+        """
+
+REMINDER_TEXT_TEMPLATE = """
+Appointment Reminder
+
+Dear {{ patient_name }},
+
+This is a friendly reminder about your upcoming dental appointment:
+
+Appointment Details:
+Treatment: {{ treatment_name }}
+Date: {{ appointment_date }}
+Time: {{ appointment_time }}
+Duration: {{ duration }} minutes
+Doctor: {{ doctor_name }}
+
+Please bring:
+- Photo ID
+- Insurance card
+- List of current medications
+- Payment method
+
+If you need to reschedule or cancel, please call us at {{ clinic_phone }} at least 24 hours in advance.
+
+We look forward to seeing you tomorrow!
+
+Best regards,
+{{ clinic_name }}
+{{ clinic_address }}
+{{ clinic_phone }}
+        """
+
+FOLLOWUP_HTML_TEMPLATE = """
+        <html>
+        <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
+            <div style="max-width: 600px; margin: 0 auto; padding: 20px;">
+                <h2 style="color: #2c5aa0;">Thank You for Your Visit!</h2>
+                
+                <p>Dear {{ patient_name }},</p>
+                
+                <p>Thank you for choosing {{ clinic_name }} for your dental care. We hope you had a positive experience with us today.</p>
+                
+                <div style="background-color: #f8f9fa; padding: 15px; border-radius: 5px; margin: 20px 0;">
+                    <strong>Treatment Summary:</strong><br>
+                    <strong>Treatment:</strong> {{ treatment_name }}<br>
+                    <strong>Date:</strong> {{ appointment_date }}<br>
+                    <strong>Doctor:</strong> {{ doctor_name }}
+                </div>
+                
+                <h3 style="color: #2c5aa0;">Post-Treatment Care Instructions:</h3>
+                <ul>
+                    <li>Avoid hard or sticky foods for 24 hours</li>
+                    <li>Take prescribed medications as directed</li>
+                    <li>Maintain good oral hygiene</li>
+                    <li>Apply ice if you experience swelling</li>
+                    <li>Contact us if you experience unusual pain or complications</li>
+                </ul>
+                
+                <h3 style="color: #2c5aa0;">Medication Reminders:</h3>
+                <p>If you were prescribed medications, please take them as directed. Contact us if you experience any adverse reactions.</p>
+                
+                <div style="background-color: #e8f5e8; padding: 15px; border-radius: 5px; margin: 20px 0; text-align: center;">
+                    <h3 style="color: #2c5aa0;">Share Your Experience!</h3>
+                    <p>If you have any questions or concerns, please don't hesitate to contact us at {{ contact_phone }}.</p>
+                    <p style="margin-top: 10px; font-size: 14px; color: #666;">{{ clinic_name }}<br>{{ contact_address }}<br>{{ contact_phone }}</p>
+                </div>
+                
+                <p>If you have any questions or concerns, please don't hesitate to contact us at {{ clinic_phone }}.</p>
+                
+                <p>We look forward to seeing you at your next appointment!</p>
+                
+                <p>Best regards,<br>
+                <strong>{{ clinic_name }}</strong><br>
+                {{ clinic_address }}<br>
+                {{ clinic_phone }}</p>
+            </div>
+        </body>
+        </html>
+        """
+
+FOLLOWUP_TEXT_TEMPLATE = """
+Thank You for Your Visit!
+
+Dear {{ patient_name }},
+
+Thank you for choosing {{ clinic_name }} for your dental care. We hope you had a positive experience with us today.
+
+Treatment Summary:
+Treatment: {{ treatment_name }}
+Date: {{ appointment_date }}
+Doctor: {{ doctor_name }}
+
+Post-Treatment Care Instructions:
+- Avoid hard or sticky foods for 24 hours
+- Take prescribed medications as directed
+- Maintain good oral hygiene
+- Apply ice if you experience swelling
+- Contact us if you experience unusual pain or complications
+
+Medication Reminders:
+If you were prescribed medications, please take them as directed. Contact us if you experience any adverse reactions.
+
+Share Your Experience!
+If you have any questions or concerns, please don't hesitate to contact us at {{ contact_phone }}.
+
+{{ clinic_name }}
+{{ contact_address }}
+{{ contact_phone }}
+
+If you have any questions or concerns, please don't hesitate to contact us at {{ clinic_phone }}.
+
+We look forward to seeing you at your next appointment!
+
+Best regards,
+{{ clinic_name }}
+{{ clinic_address }}
+{{ clinic_phone }}
+        """
+
+_html_env = Environment(autoescape=True, auto_reload=False, cache_size=-1)
+_text_env = Environment(autoescape=False, auto_reload=False, cache_size=-1)
+_REMINDER_HTML = _html_env.from_string(REMINDER_HTML_TEMPLATE)
+_REMINDER_TEXT = _text_env.from_string(REMINDER_TEXT_TEMPLATE)
+_FOLLOWUP_HTML = _html_env.from_string(FOLLOWUP_HTML_TEMPLATE)
+_FOLLOWUP_TEXT = _text_env.from_string(FOLLOWUP_TEXT_TEMPLATE)
+
 @dataclass
 class AppointmentContext:
     """Context data for generating personalized emails"""
@@ -19,7 +206,7 @@ class AppointmentContext:
     patient_email: str
     patient_phone: str
     treatment_type: str
-    appointment_date: str
+    appointment_date: Optional[str]
     appointment_time: str
     duration: int
     price: float
@@ -37,6 +224,8 @@ class AIContentGenerator:
     def __init__(self):
         self.groq_api_key = os.getenv('GROQ_API_KEY')
         self.client = None
+        self._template_cache: "OrderedDict[Tuple[str, str, Optional[str]], Tuple[float, Dict[str, str]]]" = OrderedDict()
+        self._template_cache_lock = threading.Lock()
         
         if self.groq_api_key:
             self.client = Groq(api_key=self.groq_api_key)
@@ -48,33 +237,232 @@ class AIContentGenerator:
         """Check if GROQ is properly configured"""
         return self.groq_api_key is not None and self.client is not None
     
+    def generate_email(self, context: AppointmentContext, email_type: str) -> Dict[str, str]:
+        """Generate a reminder or follow-up email, reusing cached templates where possible
+        
+        Appointments with patient or admin notes always get a fresh generation,
+        since those notes shape the content.
+        """
+        generate = self.generate_reminder_email if email_type == 'reminder' else self.generate_followup_email
+        
+        if context.notes or context.admin_notes or not self.is_configured():
+            return generate(context)
+        
+        # Clinic settings are baked into the generated text, so a settings change must miss the cache
+        key = (email_type, context.treatment_type, context.status, self._clinic_settings_fingerprint())
+        now = time.monotonic()
+        
+        with self._template_cache_lock:
+            entry = self._template_cache.get(key)
+            if entry and entry[0] > now:
+                self._template_cache.move_to_end(key)
+                template = entry[1]
+            else:
+                template = None
+        
+        if template is None:
+            placeholder_context = replace(
+                context, **{field: '{' + field + '}' for field in TEMPLATE_PLACEHOLDER_FIELDS}
+            )
+            try:
+                if email_type == 'reminder':
+                    template = self._generate_reminder_with_ai(placeholder_context)
+                else:
+                    template = self._generate_followup_with_ai(placeholder_context)
+            except Exception as e:
+                # Don't cache the fallback; the next email retries the LLM
+                logger.error(f"Error generating {email_type} email template with AI: {str(e)}")
+                if email_type == 'reminder':
+                    return self._get_fallback_reminder_email(context)
+                return self._get_fallback_followup_email(context)
+            
+            with self._template_cache_lock:
+                self._template_cache[key] = (now + TEMPLATE_CACHE_TTL, template)
+                self._template_cache.move_to_end(key)
+                while len(self._template_cache) > TEMPLATE_CACHE_SIZE:
+                    self._template_cache.popitem(last=False)
+        
+        return self._fill_template(template, context)
+    
+    def _clinic_settings_fingerprint(self) -> int:
+        """Hash of the current clinic settings, for keying cached templates"""
+        db = SessionLocal()
+        try:
+            return hash(frozenset(get_all_settings_dict(db).items()))
+        finally:
+            db.close()
+    
+    def _fill_template(self, template: Dict[str, str], context: AppointmentContext) -> Dict[str, str]:
+        """Substitute the per-appointment fields into a cached email template"""
+        subject = template['subject']
+        html_content = template['html_content']
+        plain_text_content = template['plain_text_content']
+        
+        for field in TEMPLATE_PLACEHOLDER_FIELDS:
+            placeholder = '{' + field + '}'
+            value = str(getattr(context, field) or '')
+            subject = subject.replace(placeholder, value)
+            html_content = html_content.replace(placeholder, html.escape(value))
+            plain_text_content = plain_text_content.replace(placeholder, value)
+        
+        return {
+            "subject": subject,
+            "html_content": html_content,
+            "plain_text_content": plain_text_content
+        }
+    
     def generate_reminder_email(self, context: AppointmentContext) -> Dict[str, str]:
         """Generate a reminder email for appointment tomorrow"""
         if not self.is_configured():
             return self._get_fallback_reminder_email(context)
         
         try:
-            # Get dynamic clinic settings
-            db = SessionLocal()
+            return self._generate_reminder_with_ai(context)
+        except Exception as e:
+            logger.error(f"Error generating reminder email with AI: {str(e)}")
+            return self._get_fallback_reminder_email(context)
+    
+    def _generate_reminder_with_ai(self, context: AppointmentContext) -> Dict[str, str]:
+        """Generate a reminder email with the LLM, raising on failure"""
+        # Get dynamic clinic settings
+        db = SessionLocal()
+        try:
             clinic_settings = get_all_settings_dict(db)
+        finally:
             db.close()
+        
+        prompt = self._build_reminder_prompt(context, clinic_settings) + EMAIL_FORMAT_INSTRUCTIONS
+        
+        response = self.client.chat.completions.create(
+            model="llama3-8b-8192",
+            messages=[
+                {"role": "system", "content": "You are a professional dental office assistant writing appointment reminder emails. Be friendly, professional, and reassuring."},
+                {"role": "user", "content": prompt}
+            ],
+            max_tokens=1000,
+            temperature=0.7
+        )
+        
+        content = response.choices[0].message.content
+        logger.info(f"GROQ reminder response: {content[:500]}...")
+        if "BODY:" not in content:
+            raise ValueError("GROQ response has no BODY section")
+        return self._parse_ai_response(content)
+    
+    def generate_followup_email(self, context: AppointmentContext) -> Dict[str, str]:
+        """Generate a follow-up email after appointment"""
+        if not self.is_configured():
+            return self._get_fallback_followup_email(context)
+        
+        try:
+            return self._generate_followup_with_ai(context)
+        except Exception as e:
+            logger.error(f"Error generating follow-up email with AI: {str(e)}")
+            return self._get_fallback_followup_email(context)
+    
+    def _generate_followup_with_ai(self, context: AppointmentContext) -> Dict[str, str]:
+        """Generate a follow-up email with the LLM, raising on failure"""
+        # Get dynamic clinic settings
+        db = SessionLocal()
+        try:
+            clinic_settings = get_all_settings_dict(db)
+        finally:
+            db.close()
+        
+        prompt = self._build_followup_prompt(context, clinic_settings) + EMAIL_FORMAT_INSTRUCTIONS
+        
+        response = self.client.chat.completions.create(
+            model="llama3-8b-8192",
+            messages=[
+                {"role": "system", "content": "You are a professional dental office assistant writing follow-up emails. Be caring, informative, and helpful with post-treatment care."},
+                {"role": "user", "content": prompt}
+            ],
+            max_tokens=1200,
+            temperature=0.7
+        )
+        
+        content = response.choices[0].message.content
+        logger.info(f"GROQ followup response: {content[:500]}...")
+        if "BODY:" not in content:
+            raise ValueError("GROQ response has no BODY section")
+        return self._parse_ai_response(content)
+    
+    def generate_both(self, context: AppointmentContext) -> Optional[Dict[str, Dict[str, str]]]:
+        """Generate the reminder and follow-up emails with a single LLM call
+        
+        Returns {'reminder': {...}, 'followup': {...}}, or None when AI is not
+        configured or the call fails (callers then generate each email on demand).
+        """
+        if not self.is_configured():
+            return None
+        
+        try:
+            with SessionLocal() as db:
+                clinic_settings = get_all_settings_dict(db)
+            
+            prompt = f"""
+Write two emails for the same dental appointment.
+
+EMAIL 1 - REMINDER (sent the day before):
+{self._build_reminder_prompt(context, clinic_settings)}
+EMAIL 2 - FOLLOW-UP (sent after the appointment is completed):
+{self._build_followup_prompt(context, clinic_settings)}
+For each email, generate both a subject line and email body in HTML format.
+Return in this format:
+REMINDER_SUBJECT: [subject line]
+REMINDER_BODY: [HTML email body]
+FOLLOWUP_SUBJECT: [subject line]
+FOLLOWUP_BODY: [HTML email body]
+"""
             
-            # Get treatment details
-            treatment_info = TREATMENT_TYPES.get(context.treatment_type, {})
-            treatment_name = treatment_info.get('name', context.treatment_type)
+            response = self.client.chat.completions.create(
+                model="llama3-8b-8192",
+                messages=[
+                    {"role": "system", "content": "You are a professional dental office assistant writing appointment reminder and follow-up emails. Be friendly, professional, reassuring, and helpful with post-treatment care."},
+                    {"role": "user", "content": prompt}
+                ],
+                max_tokens=2200,
+                temperature=0.7
+            )
             
-            # Use dynamic clinic info or fallback to context defaults
-            clinic_name = clinic_settings.get('clinic_name', context.clinic_name)
-            doctor_name = clinic_settings.get('doctor_name', context.doctor_name)
-            clinic_phone = clinic_settings.get('clinic_phone', context.clinic_phone)
-            clinic_address = clinic_settings.get('clinic_address', context.clinic_address)
-            business_hours = clinic_settings.get('business_hours', 'Monday-Friday: 9:00 AM - 5:30 PM')
+            content = response.choices[0].message.content
+            logger.info(f"GROQ combined response: {content[:500]}...")
             
-            # Create prompt for GROQ
-            patient_notes_section = f"\n- Patient Notes: {context.notes}" if context.notes else ""
-            admin_notes_section = f"\n- Admin Notes: {context.admin_notes}" if context.admin_notes else ""
+            if "FOLLOWUP_SUBJECT:" not in content:
+                logger.error("Combined AI response is missing the follow-up email")
+                return None
             
-            prompt = f"""
+            reminder_part, followup_part = content.split("FOLLOWUP_SUBJECT:", 1)
+            reminder_part = reminder_part.replace("REMINDER_SUBJECT:", "SUBJECT:").replace("REMINDER_BODY:", "BODY:")
+            followup_part = "SUBJECT:" + followup_part.replace("FOLLOWUP_BODY:", "BODY:")
+            
+            return {
+                "reminder": self._parse_ai_response(reminder_part),
+                "followup": self._parse_ai_response(followup_part)
+            }
+            
+        except Exception as e:
+            logger.error(f"Error generating combined emails with AI: {str(e)}")
+            return None
+    
+    def _build_reminder_prompt(self, context: AppointmentContext, clinic_settings: Dict[str, str]) -> str:
+        """Describe the reminder email to write for this appointment"""
+        # Get treatment details
+        treatment_info = TREATMENT_TYPES.get(context.treatment_type, {})
+        treatment_name = treatment_info.get('name', context.treatment_type)
+        
+        # Use dynamic clinic info or fallback to context defaults
+        clinic_name = clinic_settings.get('clinic_name', context.clinic_name)
+        doctor_name = clinic_settings.get('doctor_name', context.doctor_name)
+        clinic_phone = clinic_settings.get('clinic_phone', context.clinic_phone)
+        clinic_address = clinic_settings.get('clinic_address', context.clinic_address)
+        business_hours = clinic_settings.get('business_hours', 'Monday-Friday: 9:00 AM - 5:30 PM')
+        
+        # Create prompt for GROQ
+        patient_notes_section = f"\n- Patient Notes: {context.notes}" if context.notes else ""
+        admin_notes_section = f"\n- Admin Notes: {context.admin_notes}" if context.admin_notes else ""
+        
+        return f"""
 Write a friendly and professional dental appointment reminder email.
 
 Appointment Details:
@@ -102,56 +490,25 @@ The email should:
 7. If admin notes are present, incorporate relevant information professionally
 8. If patient notes indicate specific concerns, address them reassuringly
 
-Generate both a subject line and email body in HTML format.
-Return in this format:
-SUBJECT: [subject line]
-BODY: [HTML email body]
 """
-            
-            response = self.client.chat.completions.create(
-                model="llama3-8b-8192",
-                messages=[
-                    {"role": "system", "content": "You are a professional dental office assistant writing appointment reminder emails. Be friendly, professional, and reassuring."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=1000,
-                temperature=0.7
-            )
-            
-            content = response.choices[0].message.content
-            logger.info(f"GROQ reminder response: {content[:500]}...")
-            return self._parse_ai_response(content)
-            
-        except Exception as e:
-            logger.error(f"Error generating reminder email with AI: {str(e)}")
-            return self._get_fallback_reminder_email(context)
     
-    def generate_followup_email(self, context: AppointmentContext) -> Dict[str, str]:
-        """Generate a follow-up email after appointment"""
-        if not self.is_configured():
-            return self._get_fallback_followup_email(context)
+    def _build_followup_prompt(self, context: AppointmentContext, clinic_settings: Dict[str, str]) -> str:
+        """Describe the follow-up email to write for this appointment"""
+        # Get treatment details
+        treatment_info = TREATMENT_TYPES.get(context.treatment_type, {})
+        treatment_name = treatment_info.get('name', context.treatment_type)
         
-        try:
-            # Get dynamic clinic settings
-            db = SessionLocal()
-            clinic_settings = get_all_settings_dict(db)
-            db.close()
-            
-            # Get treatment details
-            treatment_info = TREATMENT_TYPES.get(context.treatment_type, {})
-            treatment_name = treatment_info.get('name', context.treatment_type)
-            
-            # Use dynamic clinic info or fallback to context defaults
-            clinic_name = clinic_settings.get('clinic_name', context.clinic_name)
-            doctor_name = clinic_settings.get('doctor_name', context.doctor_name)
-            clinic_phone = clinic_settings.get('clinic_phone', context.clinic_phone)
-            google_review_url = clinic_settings.get('google_review_url', 'https://g.page/r/YOUR_GOOGLE_BUSINESS_ID/review')
-            
-            # Create prompt for GROQ
-            patient_notes_section = f"\n- Patient Notes: {context.notes}" if context.notes else ""
-            admin_notes_section = f"\n- Admin Notes: {context.admin_notes}" if context.admin_notes else ""
-            
-            prompt = f"""
+        # Use dynamic clinic info or fallback to context defaults
+        clinic_name = clinic_settings.get('clinic_name', context.clinic_name)
+        doctor_name = clinic_settings.get('doctor_name', context.doctor_name)
+        clinic_phone = clinic_settings.get('clinic_phone', context.clinic_phone)
+        google_review_url = clinic_settings.get('google_review_url', 'https://g.page/r/YOUR_GOOGLE_BUSINESS_ID/review')
+        
+        # Create prompt for GROQ
+        patient_notes_section = f"\n- Patient Notes: {context.notes}" if context.notes else ""
+        admin_notes_section = f"\n- Admin Notes: {context.admin_notes}" if context.admin_notes else ""
+        
+        return f"""
 Write a professional dental follow-up email after a completed appointment.
 
 Appointment Details:
@@ -180,29 +537,7 @@ The email should:
 10. IMPORTANT: Include a prominent call-to-action asking them to leave a Google review using the provided Google Review Link
 11. Make the Google review request warm and personal, explaining how reviews help other patients find quality dental care
 
-Generate both a subject line and email body in HTML format.
-Return in this format:
-SUBJECT: [subject line]
-BODY: [HTML email body]
 """
-            
-            response = self.client.chat.completions.create(
-                model="llama3-8b-8192",
-                messages=[
-                    {"role": "system", "content": "You are a professional dental office assistant writing follow-up emails. Be caring, informative, and helpful with post-treatment care."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=1200,
-                temperature=0.7
-            )
-            
-            content = response.choices[0].message.content
-            logger.info(f"GROQ followup response: {content[:500]}...")
-            return self._parse_ai_response(content)
-            
-        except Exception as e:
-            logger.error(f"Error generating follow-up email with AI: {str(e)}")
-            return self._get_fallback_followup_email(context)
     
     def _parse_ai_response(self, content: str) -> Dict[str, str]:
         """Parse AI response to extract subject and body"""
@@ -245,192 +580,38 @@ BODY: [HTML email body]
         plain_text = re.sub(r'\s+', ' ', plain_text).strip()
         return plain_text
     
+    def _fallback_template_values(self, context: AppointmentContext) -> Dict:
+        """Flatten the context once so the HTML and plain-text renders share it"""
+        values = asdict(context)
+        treatment_info = TREATMENT_TYPES.get(context.treatment_type, {})
+        values['treatment_name'] = treatment_info.get('name', context.treatment_type)
+        return values
+    
     def _get_fallback_reminder_email(self, context: AppointmentContext) -> Dict[str, str]:
         """Fallback reminder email when AI is not available"""
-        treatment_info = TREATMENT_TYPES.get(context.treatment_type, {})
-        treatment_name = treatment_info.get('name', context.treatment_type)
-        
-        subject = f"Reminder: Your {treatment_name} appointment tomorrow"
-        
-        html_content = f"""
-        <html>
-        <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
-            <div style="max-width: 600px; margin: 0 auto; padding: 20px;">
-                <h2 style="color: #2c5aa0;">Appointment Reminder</h2>
-                
-                <p>Dear {context.patient_name},</p>
-                
-                <p>This is a friendly reminder about your upcoming dental appointment:</p>
-                
-                <div style="background-color: #f8f9fa; padding: 15px; border-radius: 5px; margin: 20px 0;">
-                    <strong>Appointment Details:</strong><br>
-                    <strong>Treatment:</strong> {treatment_name}<br>
-                    <strong>Date:</strong> {context.appointment_date}<br>
-                    <strong>Time:</strong> {context.appointment_time}<br>
-                    <strong>Duration:</strong> {context.duration} minutes<br>
-                    <strong>Doctor:</strong> {context.doctor_name}
-                </div>
-                
-                <p><strong>Please bring:</strong></p>
-                <ul>
-                    <li>Photo ID</li>
-                    <li>Insurance card</li>
-                    <li>List of current medications</li>
-                    <li>Payment method</li>
-                </ul>
-                
-                <p>If you need to reschedule or cancel, please call us at {context.clinic_phone} at least 24 hours in advance.</p>
-                
-                <p>We look forward to seeing you tomorrow!</p>
-                
-                <p>Best regards,<br>
-                <strong>{context.clinic_name}</strong><br>
-                {context.clinic_address}<br>
-                {context.clinic_phone}</p>
-            </div>
-        </body>
-        </html>
-        """
-        
-        plain_text = f"""
-Appointment Reminder
-
-Dear {context.patient_name},
-
-This is a friendly reminder about your upcoming dental appointment:
-
-Appointment Details:
-Treatment: {treatment_name}
-Date: {context.appointment_date}
-Time: {context.appointment_time}
-Duration: {context.duration} minutes
-Doctor: {context.doctor_name}
-
-Please bring:
-- Photo ID
-- Insurance card
-- List of current medications
-- Payment method
-
-If you need to reschedule or cancel, please call us at {context.clinic_phone} at least 24 hours in advance.
-
-We look forward to seeing you tomorrow!
-
-Best regards,
-{context.clinic_name}
-{context.clinic_address}
-{context.clinic_phone}
-        """
+        values = self._fallback_template_values(context)
         
         return {
-            "subject": subject,
-            "html_content": html_content,
-            "plain_text_content": plain_text
+            "subject": f"Reminder: Your {values['treatment_name']} appointment tomorrow",
+            "html_content": _REMINDER_HTML.render(values),
+            "plain_text_content": _REMINDER_TEXT.render(values)
         }
     
     def _get_fallback_followup_email(self, context: AppointmentContext) -> Dict[str, str]:
         """Fallback follow-up email when AI is not available"""
-        treatment_info = TREATMENT_TYPES.get(context.treatment_type, {})
-        treatment_name = treatment_info.get('name', context.treatment_type)
-        
-        subject = f"Thank you for your visit - {treatment_name} follow-up"
+        values = self._fallback_template_values(context)
         
         # Clinic contact information
-        clinic_phone = os.getenv('CLINIC_PHONE', '(555) 123-4567')
-        clinic_address = os.getenv('CLINIC_ADDRESS', '123 Main St, City, State 12345')
-        
-        html_content = f"""
-        <html>
-        <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
-            <div style="max-width: 600px; margin: 0 auto; padding: 20px;">
-                <h2 style="color: #2c5aa0;">Thank You for Your Visit!</h2>
-                
-                <p>Dear {context.patient_name},</p>
-                
-                <p>Thank you for choosing {context.clinic_name} for your dental care. We hope you had a positive experience with us today.</p>
-                
-                <div style="background-color: #f8f9fa; padding: 15px; border-radius: 5px; margin: 20px 0;">
-                    <strong>Treatment Summary:</strong><br>
-                    <strong>Treatment:</strong> {treatment_name}<br>
-                    <strong>Date:</strong> {context.appointment_date}<br>
-                    <strong>Doctor:</strong> {context.doctor_name}
-                </div>
-                
-                <h3 style="color: #2c5aa0;">Post-Treatment Care Instructions:</h3>
-                <ul>
-                    <li>Avoid hard or sticky foods for 24 hours</li>
-                    <li>Take prescribed medications as directed</li>
-                    <li>Maintain good oral hygiene</li>
-                    <li>Apply ice if you experience swelling</li>
-                    <li>Contact us if you experience unusual pain or complications</li>
-                </ul>
-                
-                <h3 style="color: #2c5aa0;">Medication Reminders:</h3>
-                <p>If you were prescribed medications, please take them as directed. Contact us if you experience any adverse reactions.</p>
-                
-                <div style="background-color: #e8f5e8; padding: 15px; border-radius: 5px; margin: 20px 0; text-align: center;">
-                    <h3 style="color: #2c5aa0;">Share Your Experience!</h3>
-                    <p>If you have any questions or concerns, please don't hesitate to contact us at {clinic_phone}.</p>
-                    <p style="margin-top: 10px; font-size: 14px; color: #666;">{clinic_name}<br>{clinic_address}<br>{clinic_phone}</p>
-                </div>
-                
-                <p>If you have any questions or concerns, please don't hesitate to contact us at {context.clinic_phone}.</p>
-                
-                <p>We look forward to seeing you at your next appointment!</p>
-                
-                <p>Best regards,<br>
-                <strong>{context.clinic_name}</strong><br>
-                {context.clinic_address}<br>
-                {context.clinic_phone}</p>
-            </div>
-        </body>
-        </html>
-        """
-        
-        plain_text = f"""
-Thank You for Your Visit!
-
-Dear {context.patient_name},
-
-Thank you for choosing {context.clinic_name} for your dental care. We hope you had a positive experience with us today.
-
-Treatment Summary:
-Treatment: {treatment_name}
-Date: {context.appointment_date}
-Doctor: {context.doctor_name}
-
-Post-Treatment Care Instructions:
-- Avoid hard or sticky foods for 24 hours
-- Take prescribed medications as directed
-- Maintain good oral hygiene
-- Apply ice if you experience swelling
-- Contact us if you experience unusual pain or complications
-
-Medication Reminders:
-If you were prescribed medications, please take them as directed. Contact us if you experience any adverse reactions.
-
-Share Your Experience!
-If you have any questions or concerns, please don't hesitate to contact us at {clinic_phone}.\n\n{clinic_name}\n{clinic_address}\n{clinic_phone}
-
-If you have any questions or concerns, please don't hesitate to contact us at {context.clinic_phone}.
-
-We look forward to seeing you at your next appointment!
-
-Best regards,
-{context.clinic_name}
-{context.clinic_address}
-{context.clinic_phone}
-        """
+        values['contact_phone'] = os.getenv('CLINIC_PHONE', '(555) 123-4567')
+        values['contact_address'] = os.getenv('CLINIC_ADDRESS', '123 Main St, City, State 12345')
         
         return {
-            "subject": subject,
-            "html_content": html_content,
-            "plain_text_content": plain_text
+            "subject": f"Thank you for your visit - {values['treatment_name']} follow-up",
+            "html_content": _FOLLOWUP_HTML.render(values),
+            "plain_text_content": _FOLLOWUP_TEXT.render(values)
         }
 
-# Global AI content generator instance
-ai_generator = AIContentGenerator()
-
+@lru_cache(maxsize=1)
 def get_ai_content_generator() -> AIContentGenerator:
     """Get the global AI content generator instance"""
-    return ai_generator
\ No newline at end of file
+    return AIContentGenerator()
\ No newline at end of file
@@ -3,6 +3,7 @@ from sqlalchemy.orm import Session
 from typing import List, Dict, Optional
 from pydantic import BaseModel
 import logging
+import orjson
 
 from database import get_db
 from models import KnowledgeBase, ChatSession, ChatMessage
@@ -10,6 +11,7 @@ from chatbot_service import get_chatbot_service
 from qa_management import get_qa_manager
 from dental_corpus import get_dental_corpus_loader
 from vector_search import get_vector_search_engine
+from embeddings_service import embedding_from_bytes
 
 logger = logging.getLogger(__name__)
 
@@ -36,6 +38,9 @@ class QACreate(BaseModel):
     source: str = "user_defined"
     source_url: Optional[str] = None
 
+class QABulkCreate(BaseModel):
+    items: List[QACreate]
+
 class QAUpdate(BaseModel):
     question: str
     answer: str
@@ -60,6 +65,12 @@ class SearchQuery(BaseModel):
     threshold: float = 0.7
     category: Optional[str] = None
 
+def _embedding_json(embedding_vector: Optional[bytes]) -> Optional[str]:
+    """Render a stored float32 embedding as the JSON list the API has always returned"""
+    if not embedding_vector:
+        return None
+    return orjson.dumps(embedding_from_bytes(embedding_vector), option=orjson.OPT_SERIALIZE_NUMPY).decode()
+
 # Chat endpoints
 @router.post("/chat", response_model=ChatResponse)
 async def chat(query: ChatQuery, db: Session = Depends(get_db)):
@@ -248,7 +259,7 @@ async def create_qa_pair(qa: QACreate, db: Session = Depends(get_db)):
             is_active=kb_entry.is_active,
             created_at=kb_entry.created_at.isoformat(),
             updated_at=kb_entry.updated_at.isoformat() if kb_entry.updated_at else None,
-            embedding_vector=kb_entry.embedding_vector,
+            embedding_vector=_embedding_json(kb_entry.embedding_vector),
             embedding_model=kb_entry.embedding_model
         )
         
@@ -261,6 +272,30 @@ async def create_qa_pair(qa: QACreate, db: Session = Depends(get_db)):
             detail="Internal server error"
         )
 
+@router.post("/qa/bulk")
+def create_qa_pairs_bulk(bulk: QABulkCreate, db: Session = Depends(get_db)):
+    """Create many QA pairs with one batched embedding pass and one index rebuild"""
+    try:
+        qa_manager = get_qa_manager()
+        created_count = qa_manager.batch_create_qa_pairs(db, [item.model_dump() for item in bulk.items])
+        
+        if bulk.items and not created_count:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Failed to create QA pairs"
+            )
+        
+        return {"created": created_count, "requested": len(bulk.items)}
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error bulk creating QA pairs: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error"
+        )
+
 @router.get("/qa", response_model=List[QAResponse])
 async def list_qa_pairs(
     category: Optional[str] = None,
@@ -291,7 +326,7 @@ async def list_qa_pairs(
                 is_active=entry.is_active,
                 created_at=entry.created_at.isoformat(),
                 updated_at=entry.updated_at.isoformat() if entry.updated_at else None,
-                embedding_vector=entry.embedding_vector,
+                embedding_vector=_embedding_json(entry.embedding_vector),
                 embedding_model=entry.embedding_model
             )
             for entry in kb_entries
@@ -305,6 +340,22 @@ async def list_qa_pairs(
         )
 
 # Move specific routes before parameterized routes to avoid conflicts
+@router.get("/qa/questions")
+async def get_questions(db: Session = Depends(get_db)):
+    """Get the questions of all active QA pairs (lets bulk loaders skip existing entries)"""
+    try:
+        qa_manager = get_qa_manager()
+        questions = qa_manager.get_questions(db)
+        
+        return {"questions": questions}
+        
+    except Exception as e:
+        logger.error(f"Error getting questions: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error"
+        )
+
 @router.post("/qa/search")
 async def search_qa_pairs(search: SearchQuery, db: Session = Depends(get_db)):
     """Search QA pairs using vector similarity"""
@@ -382,7 +433,7 @@ async def get_qa_pair(qa_id: int, db: Session = Depends(get_db)):
             is_active=kb_entry.is_active,
             created_at=kb_entry.created_at.isoformat(),
             updated_at=kb_entry.updated_at.isoformat() if kb_entry.updated_at else None,
-            embedding_vector=kb_entry.embedding_vector,
+            embedding_vector=_embedding_json(kb_entry.embedding_vector),
             embedding_model=kb_entry.embedding_model
         )
         
@@ -5,7 +5,7 @@ from sqlalchemy.orm import Session
 from groq import Groq
 import logging
 from datetime import datetime
-import json
+import orjson
 
 from models import ChatSession, ChatMessage, KnowledgeBase
 from vector_search import get_vector_search_engine
@@ -119,7 +119,7 @@ class ChatbotService:
                 session_id=session_id,
                 message_type="bot",
                 content=response_data["response"],
-                sources=json.dumps(response_data.get("sources", [])),
+                sources=orjson.dumps(response_data.get("sources", [])).decode(),
                 confidence_score=response_data.get("confidence_score"),
                 response_time_ms=response_time_ms
             )
@@ -275,7 +275,7 @@ No specific information was found in our knowledge base. Please provide helpful
                 history.append({
                     "message_type": message.message_type,
                     "content": message.content,
-                    "sources": json.loads(message.sources) if message.sources else [],
+                    "sources": orjson.loads(message.sources) if message.sources else [],
                     "confidence_score": message.confidence_score,
                     "created_at": message.created_at.isoformat()
                 })
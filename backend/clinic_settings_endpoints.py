@@ -1,7 +1,9 @@
 from fastapi import APIRouter, HTTPException, Depends
 from sqlalchemy.orm import Session
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 import logging
+import threading
+import time
 from datetime import datetime
 
 from database import get_db
@@ -9,6 +11,12 @@ from models import ClinicSetting
 
 router = APIRouter()
 
+# Settings change rarely but are read on every email send, so
+# get_all_settings_dict keeps them in-process for a short TTL
+SETTINGS_CACHE_TTL = 60  # seconds
+_settings_cache: Optional[Tuple[float, Dict[str, str]]] = None
+_settings_cache_lock = threading.Lock()
+
 # Default clinic settings that will be created on first run
 DEFAULT_SETTINGS = [
     {
@@ -184,6 +192,7 @@ async def update_clinic_setting(
         setting.setting_value = setting_value
         setting.updated_at = datetime.now()
         db.commit()
+        invalidate_clinic_settings_cache()
         db.refresh(setting)
         
         return {
@@ -228,6 +237,7 @@ async def create_clinic_setting(
         
         db.add(new_setting)
         db.commit()
+        invalidate_clinic_settings_cache()
         db.refresh(new_setting)
         
         return {
@@ -258,6 +268,7 @@ async def delete_clinic_setting(
         
         setting.is_active = False
         db.commit()
+        invalidate_clinic_settings_cache()
         
         return {
             "message": f"Setting {setting_key} deleted successfully",
@@ -298,6 +309,7 @@ async def initialize_default_settings(db: Session):
                 db.add(setting)
             
             db.commit()
+            invalidate_clinic_settings_cache()
             logging.info(f"Initialized {len(DEFAULT_SETTINGS)} default clinic settings")
             
     except Exception as e:
@@ -319,10 +331,30 @@ def get_setting_value(db: Session, setting_key: str, default_value: str = "") ->
         return default_value
 
 def get_all_settings_dict(db: Session) -> Dict[str, str]:
-    """Helper function to get all settings as a dictionary"""
+    """Helper function to get all settings as a dictionary (cached for SETTINGS_CACHE_TTL seconds)"""
+    global _settings_cache
+    
+    with _settings_cache_lock:
+        if _settings_cache and _settings_cache[0] > time.monotonic():
+            return dict(_settings_cache[1])
+    
     try:
-        settings = db.query(ClinicSetting).filter(ClinicSetting.is_active == True).all()
-        return {setting.setting_key: setting.setting_value for setting in settings}
+        settings = db.query(ClinicSetting.setting_key, ClinicSetting.setting_value).filter(
+            ClinicSetting.is_active == True
+        ).all()
+        settings_dict = {setting_key: setting_value for setting_key, setting_value in settings}
     except Exception as e:
         logging.error(f"Error getting all settings: {str(e)}")
-        return {}
\ No newline at end of file
+        return {}
+    
+    with _settings_cache_lock:
+        _settings_cache = (time.monotonic() + SETTINGS_CACHE_TTL, settings_dict)
+    
+    return dict(settings_dict)
+
+def invalidate_clinic_settings_cache():
+    """Drop the cached settings so the next read sees the latest values"""
+    global _settings_cache
+    
+    with _settings_cache_lock:
+        _settings_cache = None
\ No newline at end of file
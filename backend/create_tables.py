@@ -3,7 +3,7 @@ from database import Base
 from models import (
     User, Treatment, Appointment, ChatbotQA, EmailLog, EmailTemplate, 
     EmailPreference, KnowledgeBase, ChatSession, ChatMessage, 
-    VectorSearchLog, ClinicSetting
+    VectorSearchLog, ClinicSetting, ScheduledEmailContent
 )
 import os
 from dotenv import load_dotenv
@@ -218,10 +218,10 @@ class DentalCorpusLoader:
                 return True
             
             # Load corpus using batch create
-            kb_entries = self.qa_manager.batch_create_qa_pairs(db, corpus_data)
+            created_count = self.qa_manager.batch_create_qa_pairs(db, corpus_data)
             
-            if kb_entries:
-                logger.info(f"Successfully loaded {len(kb_entries)} dental corpus entries")
+            if created_count:
+                logger.info(f"Successfully loaded {created_count} dental corpus entries")
                 return True
             else:
                 logger.error("Failed to load dental corpus")
@@ -290,27 +290,16 @@ class DentalCorpusLoader:
         """Get statistics about loaded dental corpus"""
         try:
             from models import KnowledgeBase
+            from sqlalchemy import func
             
-            # Count by category
-            category_counts = {}
-            categories = db.query(KnowledgeBase.category).filter(
-                KnowledgeBase.source == 'dental_corpus'
-            ).distinct().all()
-            
-            for category_tuple in categories:
-                category = category_tuple[0]
-                if category:
-                    count = db.query(KnowledgeBase).filter(
-                        KnowledgeBase.source == 'dental_corpus',
-                        KnowledgeBase.category == category,
-                        KnowledgeBase.is_active == True
-                    ).count()
-                    category_counts[category] = count
-            
-            total_count = db.query(KnowledgeBase).filter(
+            # Count active entries per category in a single grouped query
+            rows = db.query(KnowledgeBase.category, func.count(KnowledgeBase.id)).filter(
                 KnowledgeBase.source == 'dental_corpus',
                 KnowledgeBase.is_active == True
-            ).count()
+            ).group_by(KnowledgeBase.category).all()
+            
+            category_counts = {category: count for category, count in rows if category is not None}
+            total_count = sum(count for _, count in rows)
             
             return {
                 'total_entries': total_count,
@@ -1,118 +1,367 @@
-from fastapi import APIRouter, HTTPException, Depends, Query
-from sqlalchemy.orm import Session
-from typing import List, Dict, Optional
+from fastapi import APIRouter, HTTPException, Depends, Query, Response, BackgroundTasks
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session, Query as OrmQuery, load_only
+from sqlalchemy import func, tuple_
+from sqlalchemy.exc import IntegrityError
+from typing import Annotated, Any, Awaitable, Callable, List, Dict, Optional, Tuple
+import asyncio
+import hashlib
 import logging
-from datetime import datetime, timedelta
+import threading
+import time
+from collections import OrderedDict
+from concurrent import futures
+from dataclasses import astuple
+from datetime import datetime, timedelta, timezone
 import uuid
+import orjson
 
-from database import get_db
-from models import Appointment, EmailLog, EmailTemplate, EmailPreference
-from email_services import get_email_service, EmailMessage
-from email_scheduler import get_email_scheduler
-from ai_content_generator import get_ai_content_generator, AppointmentContext
-from treatment_data import TREATMENT_TYPES
+from database import get_db, SessionLocal
+from models import Appointment, EmailLog, EmailTemplate, EmailPreference, TestEmailTask
+from email_services import get_email_service, EmailMessage, EmailServiceManager
+from email_scheduler import get_email_scheduler, EmailScheduler
+from ai_content_generator import get_ai_content_generator, AppointmentContext, AIContentGenerator
+from treatment_data import get_treatment_info
+from clinic_settings_endpoints import get_all_settings_dict
+from schemas import EmailLogResponse, EmailTemplateSummary, EmailTemplateResponse
 
 router = APIRouter()
 
+# Process-wide email components, resolved through FastAPI's dependency cache
+EmailServiceDep = Annotated[EmailServiceManager, Depends(get_email_service)]
+EmailSchedulerDep = Annotated[EmailScheduler, Depends(get_email_scheduler)]
+AIGeneratorDep = Annotated[AIContentGenerator, Depends(get_ai_content_generator)]
+
+# Short-lived cache for read-mostly monitoring endpoints: {key: (expires_at, payload)}
+HEALTH_CACHE_TTL = 10  # seconds
+STATS_CACHE_TTL = 60  # seconds
+_response_cache: Dict[Tuple, Tuple[float, Any]] = {}
+_response_cache_locks: Dict[Tuple, asyncio.Lock] = {}
+
+async def _get_cached(key: Tuple, ttl: float, compute: Callable[[], Awaitable[Any]]) -> Any:
+    """Return a cached payload for key, recomputing it at most once per TTL window.
+    
+    If recomputation fails and a previous payload exists, the stale payload is
+    returned instead of propagating the error.
+    """
+    entry = _response_cache.get(key)
+    if entry and entry[0] > time.monotonic():
+        return entry[1]
+    
+    lock = _response_cache_locks.setdefault(key, asyncio.Lock())
+    async with lock:
+        # Another request may have refreshed the entry while we waited
+        entry = _response_cache.get(key)
+        if entry and entry[0] > time.monotonic():
+            return entry[1]
+        
+        try:
+            payload = await compute()
+        except Exception as e:
+            if entry:
+                logging.warning(f"Serving stale {key[0]} payload after error: {str(e)}")
+                return entry[1]
+            raise
+        
+        _response_cache[key] = (time.monotonic() + ttl, payload)
+        return payload
+
 @router.get("/health")
-async def email_system_health():
+async def email_system_health(
+    email_service: EmailServiceDep,
+    email_scheduler: EmailSchedulerDep,
+    ai_generator: AIGeneratorDep
+):
     """Check health of email system components"""
     try:
-        email_service = get_email_service()
-        email_scheduler = get_email_scheduler()
-        ai_generator = get_ai_content_generator()
-        
-        health_status = {
-            "email_service": email_service.health_check(),
-            "scheduler": email_scheduler.health_check(),
-            "ai_generator": {
-                "configured": ai_generator.is_configured(),
-                "service": "GROQ Llama3"
+        async def compute_health():
+            # Run the sub-checks concurrently; a failing component is reported
+            # as degraded instead of failing the whole health check
+            email_status, scheduler_status, ai_configured = await asyncio.gather(
+                asyncio.to_thread(email_service.health_check),
+                asyncio.to_thread(email_scheduler.health_check),
+                asyncio.to_thread(ai_generator.is_configured),
+                return_exceptions=True
+            )
+            
+            def component_status(result):
+                if isinstance(result, Exception):
+                    logging.error(f"Email system health sub-check failed: {str(result)}")
+                    return {"error": str(result)}
+                return result
+            
+            return {
+                "email_service": component_status(email_status),
+                "scheduler": component_status(scheduler_status),
+                "ai_generator": {
+                    "configured": False if isinstance(ai_configured, Exception) else ai_configured,
+                    "service": "GROQ Llama3"
+                }
             }
-        }
         
-        return health_status
+        return await _get_cached(("health",), HEALTH_CACHE_TTL, compute_health)
         
     except Exception as e:
         logging.error(f"Error checking email system health: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to check email system health")
 
-@router.get("/logs")
-async def get_email_logs(
+# Columns returned by the log listing, so unused columns are never fetched
+EMAIL_LOG_COLUMNS = (
+    EmailLog.id, EmailLog.appointment_id, EmailLog.email_type, EmailLog.subject,
+    EmailLog.to_email, EmailLog.to_name, EmailLog.status, EmailLog.error_message,
+    EmailLog.message_id, EmailLog.sent_at, EmailLog.delivered_at, EmailLog.opened_at
+)
+
+# Template list columns; the HTML and plain-text bodies are served by the detail endpoint
+EMAIL_TEMPLATE_LIST_COLUMNS = (
+    EmailTemplate.id, EmailTemplate.name, EmailTemplate.template_type,
+    EmailTemplate.subject_template, EmailTemplate.created_at, EmailTemplate.updated_at
+)
+
+def _filter_email_logs(
+    query: OrmQuery,
+    appointment_id: Optional[int],
+    email_type: Optional[str],
+    status: Optional[str],
+    before: Optional[datetime],
+    before_id: Optional[int] = None
+) -> OrmQuery:
+    """Apply the optional /logs filters to an EmailLog query"""
+    if appointment_id:
+        query = query.filter(EmailLog.appointment_id == appointment_id)
+    
+    if email_type:
+        query = query.filter(EmailLog.email_type == email_type)
+    
+    if status:
+        query = query.filter(EmailLog.status == status)
+    
+    # Logs sharing a sent_at are ordered by id, so the compound cursor never
+    # skips rows that tie at a page boundary
+    if before and before_id is not None:
+        query = query.filter(tuple_(EmailLog.sent_at, EmailLog.id) < tuple_(before, before_id))
+    elif before:
+        query = query.filter(EmailLog.sent_at < before)
+    
+    return query
+
+@router.get("/logs", response_model=List[EmailLogResponse])
+def get_email_logs(
+    response: Response,
     appointment_id: Optional[int] = Query(None, description="Filter by appointment ID"),
     email_type: Optional[str] = Query(None, description="Filter by email type (reminder/followup)"),
     status: Optional[str] = Query(None, description="Filter by status (sent/failed/delivered/opened)"),
     limit: int = Query(50, description="Number of logs to return"),
+    before: Optional[datetime] = Query(None, description="Only return logs sent before this timestamp (pagination cursor)"),
+    before_id: Optional[int] = Query(None, description="ID of the last log on the previous page (pagination cursor)"),
     db: Session = Depends(get_db)
 ):
-    """Get email logs with optional filters"""
+    """Get email logs with optional filters
+    
+    Results are keyset-paginated on (sent_at, id): the X-Next-Cursor and
+    X-Next-Cursor-Id response headers hold the values to pass as `before` and
+    `before_id` to fetch the next page.
+    """
     try:
-        query = db.query(EmailLog)
-        
-        if appointment_id:
-            query = query.filter(EmailLog.appointment_id == appointment_id)
-        
-        if email_type:
-            query = query.filter(EmailLog.email_type == email_type)
-        
-        if status:
-            query = query.filter(EmailLog.status == status)
-        
-        logs = query.order_by(EmailLog.sent_at.desc()).limit(limit).all()
-        
-        return [{
-            "id": log.id, 
-            "appointment_id": log.appointment_id, 
-            "email_type": log.email_type, 
-            "subject": log.subject, 
-            "to_email": log.to_email, 
-            "to_name": log.to_name, 
-            "status": log.status, 
-            "error_message": log.error_message, 
-            "message_id": log.message_id, 
-            "sent_at": log.sent_at.isoformat() if log.sent_at else None, 
-            "delivered_at": log.delivered_at.isoformat() if log.delivered_at else None, 
-            "opened_at": log.opened_at.isoformat() if log.opened_at else None
-        } for log in logs]
+        query = _filter_email_logs(db.query(*EMAIL_LOG_COLUMNS), appointment_id, email_type, status, before, before_id)
+        logs = query.order_by(EmailLog.sent_at.desc(), EmailLog.id.desc()).limit(limit).all()
+        
+        if len(logs) == limit and logs[-1].sent_at:
+            response.headers["X-Next-Cursor"] = logs[-1].sent_at.isoformat()
+            response.headers["X-Next-Cursor-Id"] = str(logs[-1].id)
+        
+        return logs
         
     except Exception as e:
         logging.error(f"Error getting email logs: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to retrieve email logs")
 
-@router.post("/send-test")
-async def send_test_email(
+@router.get("/logs.ndjson")
+def export_email_logs(
+    appointment_id: Optional[int] = Query(None, description="Filter by appointment ID"),
+    email_type: Optional[str] = Query(None, description="Filter by email type (reminder/followup)"),
+    status: Optional[str] = Query(None, description="Filter by status (sent/failed/delivered/opened)"),
+    limit: Optional[int] = Query(None, description="Maximum number of logs to export"),
+    before: Optional[datetime] = Query(None, description="Only export logs sent before this timestamp"),
+    before_id: Optional[int] = Query(None, description="With `before`, only export logs ordered after this ID")
+):
+    """Stream email logs as newline-delimited JSON for large exports
+    
+    Rows are fetched from the database in batches and written out one line at a
+    time, so memory use does not grow with the number of exported logs. If the
+    export fails partway, the last line is an {"error": ...} object and the
+    response is aborted.
+    """
+    def generate_lines():
+        # The stream outlives the request handler, so it owns its session
+        db = SessionLocal()
+        try:
+            query = _filter_email_logs(db.query(*EMAIL_LOG_COLUMNS), appointment_id, email_type, status, before, before_id)
+            query = query.order_by(EmailLog.sent_at.desc(), EmailLog.id.desc())
+            if limit:
+                query = query.limit(limit)
+            
+            for row in query.yield_per(500):
+                yield orjson.dumps(row._asdict()) + b"\n"
+        except Exception as e:
+            logging.error(f"Error exporting email logs: {str(e)}")
+            # Never end a cut-short export as if it were complete: emit a final
+            # error line, then re-raise so the transfer itself is aborted
+            yield orjson.dumps({"error": "Export failed before all logs were written"}) + b"\n"
+            raise
+        finally:
+            db.close()
+    
+    return StreamingResponse(generate_lines(), media_type="application/x-ndjson")
+
+def _build_appointment_context(db: Session, appointment_id: int) -> Optional[AppointmentContext]:
+    """Load the columns needed for email generation and build an AppointmentContext"""
+    appointment = db.query(Appointment).options(load_only(
+        Appointment.patient_name, Appointment.patient_email, Appointment.patient_phone,
+        Appointment.treatment_type, Appointment.appointment_date, Appointment.appointment_time,
+        Appointment.notes, Appointment.admin_notes, Appointment.status
+    )).filter(Appointment.id == appointment_id).first()
+    
+    if not appointment:
+        return None
+    
+    treatment_info = get_treatment_info(appointment.treatment_type)
+    return AppointmentContext(
+        patient_name=appointment.patient_name,
+        patient_email=appointment.patient_email,
+        patient_phone=appointment.patient_phone,
+        treatment_type=appointment.treatment_type,
+        appointment_date=appointment.appointment_date.isoformat() if appointment.appointment_date else None,
+        appointment_time=appointment.appointment_time,
+        duration=treatment_info.duration,
+        price=treatment_info.price,
+        notes=appointment.notes,
+        admin_notes=appointment.admin_notes,
+        status=appointment.status
+    )
+
+# LRU cache of generated email content keyed by a hash of the appointment context,
+# so repeated previews/test sends of the same appointment skip the LLM round-trip
+EMAIL_CONTENT_CACHE_SIZE = 1024
+EMAIL_CONTENT_CACHE_TTL = 3600  # seconds
+_email_content_cache: "OrderedDict[str, Tuple[float, Dict[str, str]]]" = OrderedDict()
+_email_content_cache_lock = threading.Lock()
+
+def _render_email(ai_generator: AIContentGenerator, context: AppointmentContext, email_type: str) -> Dict[str, str]:
+    """Generate reminder or follow-up content, reusing cached output for identical contexts"""
+    key = hashlib.blake2b(f"{email_type}|{astuple(context)!r}".encode(), digest_size=16).hexdigest()
+    now = time.monotonic()
+    
+    with _email_content_cache_lock:
+        entry = _email_content_cache.get(key)
+        if entry and entry[0] > now:
+            _email_content_cache.move_to_end(key)
+            return dict(entry[1])
+    
+    if email_type == "reminder":
+        email_content = ai_generator.generate_reminder_email(context)
+    else:
+        email_content = ai_generator.generate_followup_email(context)
+    
+    with _email_content_cache_lock:
+        _email_content_cache[key] = (now + EMAIL_CONTENT_CACHE_TTL, email_content)
+        _email_content_cache.move_to_end(key)
+        while len(_email_content_cache) > EMAIL_CONTENT_CACHE_SIZE:
+            _email_content_cache.popitem(last=False)
+    
+    return dict(email_content)
+
+# Manual/test sends run on their own small pool so bulk clicks queue here
+# instead of opening one SendGrid connection each or tying up the shared
+# request threadpool while they wait
+EMAIL_SEND_CONCURRENCY = 8
+_email_send_executor = futures.ThreadPoolExecutor(
+    max_workers=EMAIL_SEND_CONCURRENCY, thread_name_prefix="email-send"
+)
+
+async def _run_on_send_executor(func: Callable[..., Any], *args: Any) -> Any:
+    """Run a blocking send on the dedicated email send pool"""
+    return await asyncio.get_running_loop().run_in_executor(_email_send_executor, func, *args)
+
+# Status of queued test sends lives in the database so a poll can land on
+# any worker; rows are kept for an hour
+TEST_EMAIL_TASK_TTL = 3600  # seconds
+
+def _set_test_email_status(task_id: str, **fields: Any) -> None:
+    """Record the outcome of a queued test email"""
+    with SessionLocal() as db:
+        db.query(TestEmailTask).filter(TestEmailTask.task_id == task_id).update(fields)
+        db.commit()
+
+def _process_test_email(
+    task_id: str,
+    email_service: EmailServiceManager,
+    ai_generator: AIContentGenerator,
+    context: AppointmentContext,
+    to_email: str,
+    to_name: str,
+    email_type: str,
+    clinic_settings: Dict[str, Any]
+) -> None:
+    """Generate and send a queued test email, recording the outcome under task_id"""
+    try:
+        # Generate email content (cached per appointment context)
+        email_content = _render_email(ai_generator, context, email_type)
+        
+        # Create email message
+        email_message = EmailMessage(
+            to_email=to_email,
+            to_name=to_name,
+            subject=f"[TEST] {email_content['subject']}",
+            html_content=email_content['html_content'],
+            plain_text_content=email_content['plain_text_content'],
+            from_email=clinic_settings.get('clinic_email'),
+            from_name=clinic_settings.get('clinic_name')
+        )
+        
+        result = email_service.send_email(email_message)
+        
+        _set_test_email_status(
+            task_id,
+            status="sent" if result['success'] else "failed",
+            subject=email_content['subject'],
+            message_id=result.get('message_id'),
+            error_message=result.get('error')
+        )
+        
+    except Exception as e:
+        logging.error(f"Error sending test email {task_id}: {str(e)}")
+        _set_test_email_status(task_id, status="failed", error_message="Failed to send test email")
+
+@router.post("/send-test", status_code=202)
+def send_test_email(
+    background_tasks: BackgroundTasks,
+    email_service: EmailServiceDep,
+    ai_generator: AIGeneratorDep,
     to_email: str,
     to_name: str,
     email_type: str = "reminder",  # reminder or followup
-    appointment_id: Optional[int] = None,
-    db: Session = Depends(get_db)
+    appointment_id: Optional[int] = None
 ):
-    """Send a test email"""
+    """Queue a test email; poll GET /send-test/{task_id} for the result"""
     try:
-        email_service = get_email_service()
-        ai_generator = get_ai_content_generator()
+        task_id = uuid.uuid4().hex
         
-        # Create test appointment context
-        if appointment_id:
-            appointment = db.query(Appointment).filter(Appointment.id == appointment_id).first()
-            if not appointment:
+        # Hold a database session only for the lookups, not for the LLM/SendGrid calls
+        with SessionLocal() as db:
+            context = _build_appointment_context(db, appointment_id) if appointment_id else None
+            if appointment_id and not context:
                 raise HTTPException(status_code=404, detail="Appointment not found")
+            clinic_settings = get_all_settings_dict(db)
             
-            treatment_info = TREATMENT_TYPES.get(appointment.treatment_type, {})
-            context = AppointmentContext(
-                patient_name=appointment.patient_name,
-                patient_email=appointment.patient_email,
-                patient_phone=appointment.patient_phone,
-                treatment_type=appointment.treatment_type,
-                appointment_date=appointment.appointment_date,
-                appointment_time=appointment.appointment_time,
-                duration=treatment_info.get('duration', 60),
-                price=treatment_info.get('price', 0),
-                notes=appointment.notes,
-                admin_notes=getattr(appointment, 'admin_notes', None),
-                status=appointment.status
-            )
-        else:
+            # Record the pending task and prune rows nobody will poll any more
+            expired_before = datetime.now(timezone.utc) - timedelta(seconds=TEST_EMAIL_TASK_TTL)
+            db.query(TestEmailTask).filter(TestEmailTask.created_at < expired_before).delete(synchronize_session=False)
+            db.add(TestEmailTask(task_id=task_id, email_type=email_type, status="pending"))
+            db.commit()
+        
+        # Create test appointment context
+        if not appointment_id:
             # Create dummy context for testing
             context = AppointmentContext(
                 patient_name=to_name,
@@ -128,36 +377,89 @@ async def send_test_email(
                 status="confirmed"
             )
         
-        # Generate email content
-        if email_type == "reminder":
-            email_content = ai_generator.generate_reminder_email(context)
-        else:
-            email_content = ai_generator.generate_followup_email(context)
-        
-        # Create email message
-        email_message = EmailMessage(
-            to_email=to_email,
-            to_name=to_name,
-            subject=f"[TEST] {email_content['subject']}",
-            html_content=email_content['html_content'],
-            plain_text_content=email_content['plain_text_content']
+        # Content generation and delivery run after the response is sent
+        background_tasks.add_task(
+            _run_on_send_executor, _process_test_email, task_id, email_service, ai_generator,
+            context, to_email, to_name, email_type, clinic_settings
         )
         
-        # Send email with database session for dynamic clinic settings
-        result = email_service.send_email(email_message, db=db)
-        
         return {
-            "success": result['success'],
-            "message_id": result.get('message_id'),
-            "error": result.get('error'),
+            "task_id": task_id,
+            "status": "pending",
             "email_type": email_type,
-            "subject": email_content['subject']
+            "message": "Test email queued"
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
-        logging.error(f"Error sending test email: {str(e)}")
+        logging.error(f"Error queueing test email: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to send test email")
 
+@router.get("/send-test/{task_id}")
+def get_test_email_status(task_id: str, db: Session = Depends(get_db)):
+    """Get the status of a queued test email"""
+    expired_before = datetime.now(timezone.utc) - timedelta(seconds=TEST_EMAIL_TASK_TTL)
+    task = db.query(TestEmailTask).filter(
+        TestEmailTask.task_id == task_id,
+        TestEmailTask.created_at >= expired_before
+    ).first()
+    
+    if not task:
+        raise HTTPException(status_code=404, detail="Test email task not found")
+    
+    return {
+        "task_id": task.task_id,
+        "status": task.status,
+        "success": None if task.status == "pending" else task.status == "sent",
+        "message_id": task.message_id,
+        "error": task.error_message,
+        "email_type": task.email_type,
+        "subject": task.subject
+    }
+
+def _compute_email_stats(db: Session, days: int) -> Dict:
+    """Aggregate sent/failed email counts for the last `days` days"""
+    # sent_at is timezone-aware, so compare against an aware UTC cutoff
+    cutoff_date = datetime.now(timezone.utc) - timedelta(days=days)
+    
+    # Get email counts by type and status in a single grouped query
+    rows = db.query(
+        EmailLog.email_type, EmailLog.status, func.count()
+    ).filter(
+        EmailLog.sent_at >= cutoff_date,
+        EmailLog.email_type.in_(('reminder', 'followup')),
+        EmailLog.status.in_(('sent', 'failed'))
+    ).group_by(EmailLog.email_type, EmailLog.status).all()
+    
+    counts = {(email_type, status): count for email_type, status, count in rows}
+    reminder_sent = counts.get(('reminder', 'sent'), 0)
+    reminder_failed = counts.get(('reminder', 'failed'), 0)
+    followup_sent = counts.get(('followup', 'sent'), 0)
+    followup_failed = counts.get(('followup', 'failed'), 0)
+    
+    total_sent = reminder_sent + followup_sent
+    total_failed = reminder_failed + followup_failed
+    
+    return {
+        "period_days": days,
+        "reminder_emails": {
+            "sent": reminder_sent,
+            "failed": reminder_failed,
+            "success_rate": (reminder_sent / (reminder_sent + reminder_failed)) * 100 if (reminder_sent + reminder_failed) > 0 else 0
+        },
+        "followup_emails": {
+            "sent": followup_sent,
+            "failed": followup_failed,
+            "success_rate": (followup_sent / (followup_sent + followup_failed)) * 100 if (followup_sent + followup_failed) > 0 else 0
+        },
+        "total": {
+            "sent": total_sent,
+            "failed": total_failed,
+            "success_rate": (total_sent / (total_sent + total_failed)) * 100 if (total_sent + total_failed) > 0 else 0
+        }
+    }
+
 @router.get("/stats")
 async def get_email_stats(
     days: int = Query(30, description="Number of days to look back"),
@@ -165,205 +467,173 @@ async def get_email_stats(
 ):
     """Get email statistics"""
     try:
-        cutoff_date = datetime.now() - timedelta(days=days)
-        
-        # Get email counts by type and status
-        reminder_sent = db.query(EmailLog).filter(
-            EmailLog.email_type == 'reminder',
-            EmailLog.status == 'sent',
-            EmailLog.sent_at >= cutoff_date
-        ).count()
-        
-        reminder_failed = db.query(EmailLog).filter(
-            EmailLog.email_type == 'reminder',
-            EmailLog.status == 'failed',
-            EmailLog.sent_at >= cutoff_date
-        ).count()
-        
-        followup_sent = db.query(EmailLog).filter(
-            EmailLog.email_type == 'followup',
-            EmailLog.status == 'sent',
-            EmailLog.sent_at >= cutoff_date
-        ).count()
-        
-        followup_failed = db.query(EmailLog).filter(
-            EmailLog.email_type == 'followup',
-            EmailLog.status == 'failed',
-            EmailLog.sent_at >= cutoff_date
-        ).count()
-        
-        total_sent = reminder_sent + followup_sent
-        total_failed = reminder_failed + followup_failed
+        async def compute_stats():
+            # Run the blocking query off the event loop thread
+            return await asyncio.to_thread(_compute_email_stats, db, days)
         
-        return {
-            "period_days": days,
-            "reminder_emails": {
-                "sent": reminder_sent,
-                "failed": reminder_failed,
-                "success_rate": (reminder_sent / (reminder_sent + reminder_failed)) * 100 if (reminder_sent + reminder_failed) > 0 else 0
-            },
-            "followup_emails": {
-                "sent": followup_sent,
-                "failed": followup_failed,
-                "success_rate": (followup_sent / (followup_sent + followup_failed)) * 100 if (followup_sent + followup_failed) > 0 else 0
-            },
-            "total": {
-                "sent": total_sent,
-                "failed": total_failed,
-                "success_rate": (total_sent / (total_sent + total_failed)) * 100 if (total_sent + total_failed) > 0 else 0
-            }
-        }
+        return await _get_cached(("stats", days), STATS_CACHE_TTL, compute_stats)
         
     except Exception as e:
         logging.error(f"Error getting email stats: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to retrieve email statistics")
 
 @router.post("/preview")
-async def preview_email(
+def preview_email(
+    ai_generator: AIGeneratorDep,
     appointment_id: int,
-    email_type: str = "reminder",  # reminder or followup
-    db: Session = Depends(get_db)
+    email_type: str = "reminder"  # reminder or followup
 ):
     """Preview email content without sending"""
     try:
-        ai_generator = get_ai_content_generator()
-        
-        # Get appointment data
-        appointment = db.query(Appointment).filter(Appointment.id == appointment_id).first()
-        if not appointment:
+        # Build appointment context from the appointment data, releasing the
+        # session before the LLM call
+        with SessionLocal() as db:
+            context = _build_appointment_context(db, appointment_id)
+        if not context:
             raise HTTPException(status_code=404, detail="Appointment not found")
         
-        # Create appointment context with all data
-        treatment_info = TREATMENT_TYPES.get(appointment.treatment_type, {})
-        context = AppointmentContext(
-            patient_name=appointment.patient_name,
-            patient_email=appointment.patient_email,
-            patient_phone=appointment.patient_phone,
-            treatment_type=appointment.treatment_type,
-            appointment_date=appointment.appointment_date,
-            appointment_time=appointment.appointment_time,
-            duration=treatment_info.get('duration', 60),
-            price=treatment_info.get('price', 0),
-            notes=appointment.notes,
-            admin_notes=getattr(appointment, 'admin_notes', None),
-            status=appointment.status
-        )
-        
-        # Generate email content
-        if email_type == "reminder":
-            email_content = ai_generator.generate_reminder_email(context)
-        else:
-            email_content = ai_generator.generate_followup_email(context)
+        # Generate email content (cached per appointment context)
+        email_content = _render_email(ai_generator, context, email_type)
         
         return {
             "appointment_id": appointment_id,
             "email_type": email_type,
-            "patient_name": appointment.patient_name,
-            "patient_email": appointment.patient_email,
-            "treatment": treatment_info.get('name', appointment.treatment_type),
-            "appointment_date": appointment.appointment_date,
-            "appointment_time": appointment.appointment_time,
+            "patient_name": context.patient_name,
+            "patient_email": context.patient_email,
+            "treatment": get_treatment_info(context.treatment_type).name,
+            "appointment_date": context.appointment_date,
+            "appointment_time": context.appointment_time,
             "subject": email_content['subject'],
             "html_content": email_content['html_content'],
             "plain_text_content": email_content['plain_text_content'],
             "context_used": {
-                "patient_notes": appointment.notes,
-                "admin_notes": getattr(appointment, 'admin_notes', None),
-                "status": appointment.status
+                "patient_notes": context.notes,
+                "admin_notes": context.admin_notes,
+                "status": context.status
             }
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"Error previewing email: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to preview email")
 
-@router.post("/appointments/{appointment_id}/send-reminder")
-async def send_manual_reminder(
+@router.post("/appointments/{appointment_id}/send-reminder", status_code=202)
+def send_manual_reminder(
     appointment_id: int,
+    background_tasks: BackgroundTasks,
+    email_scheduler: EmailSchedulerDep,
     db: Session = Depends(get_db)
 ):
-    """Send manual reminder email for an appointment"""
+    """Send manual reminder email for an appointment
+    
+    The email is generated and sent in a background task so the request
+    returns as soon as the appointment has been verified.
+    """
     try:
-        email_scheduler = get_email_scheduler()
-        
-        # Verify appointment exists
-        appointment = db.query(Appointment).filter(Appointment.id == appointment_id).first()
+        # Verify appointment exists, loading only the column we return
+        appointment = db.query(Appointment.id, Appointment.patient_email).filter(
+            Appointment.id == appointment_id
+        ).first()
         if not appointment:
             raise HTTPException(status_code=404, detail="Appointment not found")
         
-        # Send reminder email immediately
-        email_scheduler._send_reminder_email(appointment_id)
+        # Queue the reminder email
+        background_tasks.add_task(_run_on_send_executor, email_scheduler._send_reminder_email, appointment_id)
         
         return {
             "success": True,
-            "message": f"Reminder email sent for appointment {appointment_id}",
+            "message": f"Reminder email queued for appointment {appointment_id}",
             "appointment_id": appointment_id,
             "patient_email": appointment.patient_email
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"Error sending manual reminder: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to send reminder email")
 
-@router.post("/appointments/{appointment_id}/send-followup")
-async def send_manual_followup(
+@router.post("/appointments/{appointment_id}/send-followup", status_code=202)
+def send_manual_followup(
     appointment_id: int,
+    background_tasks: BackgroundTasks,
+    email_scheduler: EmailSchedulerDep,
     db: Session = Depends(get_db)
 ):
-    """Send manual follow-up email for an appointment"""
+    """Send manual follow-up email for an appointment
+    
+    The email is generated and sent in a background task so the request
+    returns as soon as the appointment has been verified.
+    """
     try:
-        email_scheduler = get_email_scheduler()
-        
-        # Verify appointment exists
-        appointment = db.query(Appointment).filter(Appointment.id == appointment_id).first()
+        # Verify appointment exists, loading only the column we return
+        appointment = db.query(Appointment.id, Appointment.patient_email).filter(
+            Appointment.id == appointment_id
+        ).first()
         if not appointment:
             raise HTTPException(status_code=404, detail="Appointment not found")
         
-        # Send follow-up email immediately
-        email_scheduler._send_followup_email(appointment_id)
+        # Queue the follow-up email
+        background_tasks.add_task(_run_on_send_executor, email_scheduler._send_followup_email, appointment_id)
         
         return {
             "success": True,
-            "message": f"Follow-up email sent for appointment {appointment_id}",
+            "message": f"Follow-up email queued for appointment {appointment_id}",
             "appointment_id": appointment_id,
             "patient_email": appointment.patient_email
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"Error sending manual follow-up: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to send follow-up email")
 
-@router.get("/templates")
-async def get_email_templates(
+@router.get("/templates", response_model=List[EmailTemplateSummary])
+def get_email_templates(
     template_type: Optional[str] = Query(None, description="Filter by template type"),
     db: Session = Depends(get_db)
 ):
-    """Get email templates"""
+    """Get email templates (without template bodies)"""
     try:
-        query = db.query(EmailTemplate).filter(EmailTemplate.is_active == True)
+        query = db.query(*EMAIL_TEMPLATE_LIST_COLUMNS).filter(EmailTemplate.is_active == True)
         
         if template_type:
             query = query.filter(EmailTemplate.template_type == template_type)
         
-        templates = query.order_by(EmailTemplate.created_at.desc()).all()
-        
-        return [{
-            "id": template.id,
-            "name": template.name,
-            "template_type": template.template_type,
-            "subject_template": template.subject_template,
-            "html_template": template.html_template,
-            "plain_text_template": template.plain_text_template,
-            "created_at": template.created_at.isoformat() if template.created_at else None,
-            "updated_at": template.updated_at.isoformat() if template.updated_at else None
-        } for template in templates]
+        return query.order_by(EmailTemplate.created_at.desc()).all()
         
     except Exception as e:
         logging.error(f"Error getting email templates: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to retrieve email templates")
 
+@router.get("/templates/{template_id}", response_model=EmailTemplateResponse)
+def get_email_template(
+    template_id: int,
+    db: Session = Depends(get_db)
+):
+    """Get a single email template including its HTML and plain-text bodies"""
+    try:
+        template = db.query(EmailTemplate).filter(
+            EmailTemplate.id == template_id,
+            EmailTemplate.is_active == True
+        ).first()
+        
+        if not template:
+            raise HTTPException(status_code=404, detail="Template not found")
+        
+        return template
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.error(f"Error getting email template {template_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to retrieve email template")
+
 @router.post("/templates")
-async def create_email_template(
+def create_email_template(
     name: str,
     template_type: str,
     subject_template: str,
@@ -373,11 +643,6 @@ async def create_email_template(
 ):
     """Create a new email template"""
     try:
-        # Check if template name already exists
-        existing = db.query(EmailTemplate).filter(EmailTemplate.name == name).first()
-        if existing:
-            raise HTTPException(status_code=400, detail="Template name already exists")
-        
         template = EmailTemplate(
             name=name,
             template_type=template_type,
@@ -386,8 +651,13 @@ async def create_email_template(
             plain_text_template=plain_text_template
         )
         
+        # The unique constraint on name rejects duplicates without a pre-check query
         db.add(template)
-        db.commit()
+        try:
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            raise HTTPException(status_code=400, detail="Template name already exists")
         db.refresh(template)
         
         return {
@@ -397,6 +667,9 @@ async def create_email_template(
             "message": "Template created successfully"
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
+        db.rollback()
         logging.error(f"Error creating email template: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to create email template")
\ No newline at end of file
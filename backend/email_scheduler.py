@@ -1,23 +1,52 @@
 import os
+import asyncio
 import logging
-from datetime import datetime, timedelta
+import threading
+from collections import deque
+from concurrent import futures
+from dataclasses import asdict
+from datetime import datetime, timedelta, timezone
 from typing import Dict, List, Optional
+import orjson
 from apscheduler.schedulers.background import BackgroundScheduler
-from apscheduler.triggers.date import DateTrigger
-from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
 from apscheduler.executors.pool import ThreadPoolExecutor
 from sqlalchemy.orm import Session
 
 from database import get_db, SessionLocal
-from models import Appointment, EmailLog
+from models import Appointment, EmailLog, ScheduledEmailContent
 from email_services import get_email_service, EmailMessage
 from ai_content_generator import get_ai_content_generator, AppointmentContext
-from treatment_data import TREATMENT_TYPES
+from treatment_data import TREATMENT_TYPES, parse_appointment_datetime
+from clinic_settings_endpoints import get_all_settings_dict
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Email log rows are buffered and written in batches instead of one commit per send
+EMAIL_LOG_FLUSH_INTERVAL = 5  # seconds
+EMAIL_LOG_BATCH_SIZE = 50
+
+# Due reminders/follow-ups are picked up by a periodic sweep over the appointments table
+DUE_EMAIL_SWEEP_INTERVAL = 60  # seconds
+DUE_EMAIL_BATCH_SIZE = 100
+DUE_EMAIL_WORKERS = 10
+
+def _appointment_start_utc(appointment: Appointment) -> Optional[datetime]:
+    """Appointment start as an aware UTC datetime
+    
+    Stored appointment times are wall-clock values; like the scheduler itself
+    (timezone='UTC') they are interpreted as UTC.
+    """
+    appointment_datetime = appointment.appointment_datetime or parse_appointment_datetime(
+        appointment.appointment_date, appointment.appointment_time
+    )
+    return appointment_datetime.replace(tzinfo=timezone.utc) if appointment_datetime else None
+
+# Appointment statuses that no longer get reminder emails
+INACTIVE_STATUSES = frozenset({'cancelled', 'completed'})
+
 class EmailScheduler:
     """Email scheduler for automated appointment reminders and follow-ups"""
     
@@ -25,41 +54,63 @@ class EmailScheduler:
         self.email_service = get_email_service()
         self.ai_generator = get_ai_content_generator()
         self.scheduler = None
+        self._pending_email_logs = deque()
+        self._email_log_lock = threading.Lock()
+        self._send_executor = futures.ThreadPoolExecutor(max_workers=DUE_EMAIL_WORKERS)
         self._setup_scheduler()
     
+    # One APScheduler instance per process, shared by every EmailScheduler
+    _scheduler_singleton: Optional[BackgroundScheduler] = None
+    _scheduler_singleton_lock = threading.Lock()
+    
     def _setup_scheduler(self):
-        """Set up APScheduler with memory jobstore"""
+        """Set up APScheduler with memory jobstore
+        
+        Idempotent: the scheduler and its executor are built once per process,
+        and re-initialising only rebinds existing jobs to this instance.
+        """
         try:
-            # Use memory jobstore to avoid serialization issues
-            executors = {
-                'default': ThreadPoolExecutor(20)
-            }
-            
-            job_defaults = {
-                'coalesce': False,
-                'max_instances': 3
-            }
-            
-            self.scheduler = BackgroundScheduler(
-                executors=executors,
-                job_defaults=job_defaults,
-                timezone='UTC'
-            )
-            
-            # Add periodic cleanup job
-            self.scheduler.add_job(
-                func=self._cleanup_old_jobs,
-                trigger=CronTrigger(hour=2, minute=0),  # Run at 2 AM daily
-                id='cleanup_jobs',
-                replace_existing=True
-            )
+            with EmailScheduler._scheduler_singleton_lock:
+                if EmailScheduler._scheduler_singleton is None:
+                    # Use memory jobstore to avoid serialization issues
+                    executors = {
+                        'default': ThreadPoolExecutor(30)
+                    }
+                    
+                    # Collapse missed runs into one, never overlap a job with itself, and
+                    # still run jobs that start up to 5 minutes late on a busy host
+                    job_defaults = {
+                        'coalesce': True,
+                        'max_instances': 1,
+                        'misfire_grace_time': 300
+                    }
+                    
+                    EmailScheduler._scheduler_singleton = BackgroundScheduler(
+                        executors=executors,
+                        job_defaults=job_defaults,
+                        timezone='UTC'
+                    )
+                    logger.info("Email scheduler initialized successfully")
+                
+                self.scheduler = EmailScheduler._scheduler_singleton
             
-            logger.info("Email scheduler initialized successfully")
+            # Due-email sweep and email log flush
+            self._ensure_job('dispatch_due_emails', self._dispatch_due_emails, IntervalTrigger(seconds=DUE_EMAIL_SWEEP_INTERVAL))
+            self._ensure_job('flush_email_logs', self._flush_email_logs, IntervalTrigger(seconds=EMAIL_LOG_FLUSH_INTERVAL))
             
         except Exception as e:
             logger.error(f"Failed to initialize email scheduler: {str(e)}")
             self.scheduler = None
     
+    def _ensure_job(self, job_id: str, func, trigger):
+        """Add a periodic job unless it already exists, rebinding it to this instance if needed"""
+        job = self.scheduler.get_job(job_id)
+        
+        if job is None:
+            self.scheduler.add_job(func=func, trigger=trigger, id=job_id, replace_existing=True)
+        elif job.func != func:
+            job.modify(func=func)
+    
     def start(self):
         """Start the email scheduler"""
         if self.scheduler and not self.scheduler.running:
@@ -71,291 +122,417 @@ class EmailScheduler:
         if self.scheduler and self.scheduler.running:
             self.scheduler.shutdown()
             logger.info("Email scheduler stopped")
+        
+        # Write out any logs still buffered
+        self._flush_email_logs()
     
     def schedule_appointment_emails(self, appointment_id: int) -> Dict[str, bool]:
-        """Schedule both reminder and follow-up emails for an appointment"""
+        """Schedule both reminder and follow-up emails for an appointment
+        
+        Stores the due times on the appointment; the periodic sweep sends them.
+        """
+        results = self.schedule_appointment_emails_bulk([appointment_id])
+        return results.get(appointment_id, {"reminder": False, "followup": False})
+    
+    def schedule_appointment_emails_bulk(self, appointment_ids: List[int]) -> Dict[int, Dict[str, bool]]:
+        """Schedule reminder and follow-up emails for many appointments in one query and commit"""
         try:
-            db = SessionLocal()
-            appointment = db.query(Appointment).filter(Appointment.id == appointment_id).first()
-            
-            if not appointment:
-                logger.error(f"Appointment {appointment_id} not found")
-                return {"reminder": False, "followup": False}
-            
-            # Parse appointment date and time
-            appointment_datetime = datetime.strptime(
-                f"{appointment.appointment_date} {appointment.appointment_time}",
-                "%Y-%m-%d %H:%M"
-            )
-            
-            # Schedule reminder email (24 hours before)
-            reminder_scheduled = self._schedule_reminder_email(
-                appointment_id, 
-                appointment_datetime - timedelta(hours=24)
-            )
+            with SessionLocal() as db:
+                appointments = db.query(Appointment).filter(Appointment.id.in_(appointment_ids)).all()
+                
+                found_ids = {appointment.id for appointment in appointments}
+                for appointment_id in appointment_ids:
+                    if appointment_id not in found_ids:
+                        logger.error(f"Appointment {appointment_id} not found")
+                
+                now = datetime.now(timezone.utc)
+                results = {
+                    appointment.id: self._set_email_due_times(appointment, now)
+                    for appointment in appointments
+                }
+                
+                # Capture the email context once so sends don't rebuild it
+                for appointment in appointments:
+                    if appointment.reminder_due_at or appointment.followup_due_at:
+                        appointment.email_context_json = orjson.dumps(asdict(self._build_context(appointment))).decode()
+                db.commit()
+                
+                due_times = [
+                    due_at for appointment in appointments
+                    for due_at in (appointment.reminder_due_at, appointment.followup_due_at)
+                    if due_at
+                ]
+                
+                # Appointments without notes are served from the template cache
+                noted_ids = [
+                    appointment.id for appointment in appointments
+                    if (appointment.reminder_due_at or appointment.followup_due_at) and (appointment.notes or appointment.admin_notes)
+                ]
             
-            # Schedule follow-up email (2 hours after appointment)
-            followup_scheduled = self._schedule_followup_email(
-                appointment_id,
-                appointment_datetime + timedelta(hours=2)
-            )
+            if due_times:
+                self._wake_sweep_by(min(due_times), now)
             
-            db.close()
+            if noted_ids and self.ai_generator.is_configured():
+                self._send_executor.submit(self._pregenerate_email_content, noted_ids)
             
-            return {
-                "reminder": reminder_scheduled,
-                "followup": followup_scheduled
-            }
+            return results
             
         except Exception as e:
-            logger.error(f"Error scheduling emails for appointment {appointment_id}: {str(e)}")
+            logger.error(f"Error scheduling emails for appointments {appointment_ids}: {str(e)}")
+            return {}
+    
+    def _wake_sweep_by(self, due_at: datetime, now: datetime):
+        """Pull the next due-email sweep forward if an email comes due before it"""
+        if not (self.scheduler and self.scheduler.running):
+            return
+        
+        try:
+            job = self.scheduler.get_job('dispatch_due_emails')
+            wake_at = max(due_at, now)
+            if job and job.next_run_time and wake_at < job.next_run_time:
+                job.modify(next_run_time=wake_at)
+        except Exception as e:
+            logger.error(f"Error rescheduling due-email sweep: {str(e)}")
+    
+    def _set_email_due_times(self, appointment: Appointment, now: datetime) -> Dict[str, bool]:
+        """Set the reminder/follow-up due times on an appointment (caller commits)"""
+        appointment_datetime = _appointment_start_utc(appointment)
+        if appointment_datetime is None:
+            logger.error(f"Appointment {appointment.id} has an invalid date/time")
             return {"reminder": False, "followup": False}
+        
+        # Rows created before appointment_datetime existed are backfilled
+        if appointment.appointment_datetime is None:
+            appointment.appointment_datetime = appointment_datetime.replace(tzinfo=None)
+        
+        # Reminder goes out 24 hours before, but only if that is still in the future
+        reminder_time = appointment_datetime - timedelta(hours=24)
+        if reminder_time <= now:
+            logger.warning(f"Reminder email send time {reminder_time} is in the past")
+            reminder_time = None
+        
+        # Follow-up goes out 2 hours after the appointment; a booking entered
+        # after that point (e.g. backfilled history) gets no follow-up rather
+        # than being auto-completed and emailed on the next sweep
+        followup_time = appointment_datetime + timedelta(hours=2)
+        if followup_time <= now:
+            logger.warning(f"Follow-up email send time {followup_time} is in the past")
+            followup_time = None
+        
+        appointment.reminder_due_at = reminder_time
+        appointment.reminder_sent = False
+        appointment.followup_due_at = followup_time
+        appointment.followup_sent = False
+        
+        if reminder_time:
+            logger.info(f"Reminder email scheduled for appointment {appointment.id} at {reminder_time}")
+        if followup_time:
+            logger.info(f"Follow-up email scheduled for appointment {appointment.id} at {followup_time}")
+        
+        return {
+            "reminder": reminder_time is not None,
+            "followup": followup_time is not None
+        }
     
-    def _schedule_reminder_email(self, appointment_id: int, send_time: datetime) -> bool:
-        """Schedule a reminder email"""
+    def _dispatch_due_emails(self):
+        """Send reminders and follow-ups whose due time has passed"""
         try:
-            # Only schedule if send_time is in the future
-            if send_time <= datetime.now():
-                logger.warning(f"Reminder email send time {send_time} is in the past")
-                return False
-            
-            job_id = f"reminder_{appointment_id}"
-            
-            self.scheduler.add_job(
-                func=self._send_reminder_email,
-                trigger=DateTrigger(run_date=send_time),
-                args=[appointment_id],
-                id=job_id,
-                replace_existing=True
-            )
+            # One clock read per sweep, shared by the due-time filters and completion checks
+            now = datetime.now(timezone.utc)
+            
+            with SessionLocal() as db:
+                # Row locks (skipping rows another worker already holds) keep
+                # concurrent sweeps from claiming the same appointments
+                reminder_query = db.query(Appointment.id).filter(
+                    Appointment.reminder_due_at <= now,
+                    Appointment.reminder_sent == False
+                ).order_by(Appointment.reminder_due_at).limit(DUE_EMAIL_BATCH_SIZE)
+                reminder_ids = [row.id for row in reminder_query.with_for_update(skip_locked=True)]
+                
+                followup_query = db.query(Appointment.id).filter(
+                    Appointment.followup_due_at <= now,
+                    Appointment.followup_sent == False
+                ).order_by(Appointment.followup_due_at).limit(DUE_EMAIL_BATCH_SIZE)
+                followup_ids = [row.id for row in followup_query.with_for_update(skip_locked=True)]
+                
+                if not reminder_ids and not followup_ids:
+                    return
+                
+                # Claim the batch before sending so a slow send is never picked up twice
+                if reminder_ids:
+                    db.query(Appointment).filter(Appointment.id.in_(reminder_ids)).update(
+                        {Appointment.reminder_sent: True}, synchronize_session=False
+                    )
+                if followup_ids:
+                    db.query(Appointment).filter(Appointment.id.in_(followup_ids)).update(
+                        {Appointment.followup_sent: True}, synchronize_session=False
+                    )
+                db.commit()
+            
+            # Generate content in parallel (LLM calls), then send the whole batch
+            # concurrently over one HTTP connection pool
+            jobs = [('reminder', appointment_id) for appointment_id in reminder_ids]
+            jobs += [('followup', appointment_id) for appointment_id in followup_ids]
+            messages = list(self._send_executor.map(lambda job: self._prepare_email(*job, now), jobs))
+            
+            ready = [(job, message) for job, message in zip(jobs, messages) if message]
+            if ready:
+                with SessionLocal() as db:
+                    clinic_settings = get_all_settings_dict(db)
+                
+                for _, message in ready:
+                    message.from_email = clinic_settings.get('clinic_email')
+                    message.from_name = clinic_settings.get('clinic_name')
+                
+                results = asyncio.run(self.email_service.send_emails_async([message for _, message in ready]))
+                
+                for ((email_type, appointment_id), message), result in zip(ready, results):
+                    self._record_result(appointment_id, email_type, message, result)
             
-            logger.info(f"Reminder email scheduled for appointment {appointment_id} at {send_time}")
-            return True
+            logger.info(f"Dispatched {len(reminder_ids)} reminder and {len(followup_ids)} follow-up emails")
             
         except Exception as e:
-            logger.error(f"Error scheduling reminder email: {str(e)}")
-            return False
+            logger.error(f"Error dispatching due emails: {str(e)}")
+    
+    def _prepare_reminder_email(self, db: Session, appointment_id: int) -> Optional[EmailMessage]:
+        """Build the reminder email for an appointment, or None if it should not be sent"""
+        appointment = db.get(Appointment, appointment_id)
+        
+        if not appointment:
+            logger.error(f"Appointment {appointment_id} not found for reminder email")
+            return None
+        
+        # Check if appointment is still active
+        if appointment.status in INACTIVE_STATUSES:
+            logger.info(f"Skipping reminder email for {appointment.status} appointment {appointment_id}")
+            return None
+        
+        # Use content generated at scheduling time when available
+        email_content = self._get_email_content(db, appointment, 'reminder')
+        
+        return EmailMessage(
+            to_email=appointment.patient_email,
+            to_name=appointment.patient_name,
+            subject=email_content['subject'],
+            html_content=email_content['html_content'],
+            plain_text_content=email_content['plain_text_content']
+        )
+    
+    def _prepare_followup_email(self, db: Session, appointment_id: int, now: Optional[datetime] = None) -> Optional[EmailMessage]:
+        """Build the follow-up email for an appointment, or None if it should not be sent"""
+        appointment = db.get(Appointment, appointment_id)
+        
+        if not appointment:
+            logger.error(f"Appointment {appointment_id} not found for follow-up email")
+            return None
+        
+        # Cancelled appointments never get a follow-up (or get auto-completed)
+        if appointment.status == 'cancelled':
+            logger.info(f"Skipping follow-up email for cancelled appointment {appointment_id}")
+            return None
+        
+        # Only send follow-up if appointment was completed
+        if appointment.status != 'completed':
+            # Auto-update status to completed if appointment time has passed
+            appointment_datetime = _appointment_start_utc(appointment)
+            now = now or datetime.now(timezone.utc)
+            
+            if appointment_datetime and now > appointment_datetime + timedelta(hours=2):
+                appointment.status = 'completed'
+                db.commit()
+                logger.info(f"Auto-updated appointment {appointment_id} status to completed")
+            else:
+                logger.info(f"Skipping follow-up email for non-completed appointment {appointment_id}")
+                return None
+        
+        # Use content generated at scheduling time when available
+        email_content = self._get_email_content(db, appointment, 'followup')
+        
+        return EmailMessage(
+            to_email=appointment.patient_email,
+            to_name=appointment.patient_name,
+            subject=email_content['subject'],
+            html_content=email_content['html_content'],
+            plain_text_content=email_content['plain_text_content']
+        )
+    
+    def _build_context(self, appointment: Appointment) -> AppointmentContext:
+        """Build the AI generation context for an appointment"""
+        treatment_info = TREATMENT_TYPES.get(appointment.treatment_type, {})
+        return AppointmentContext(
+            patient_name=appointment.patient_name,
+            patient_email=appointment.patient_email,
+            patient_phone=appointment.patient_phone,
+            treatment_type=appointment.treatment_type,
+            appointment_date=appointment.appointment_date.isoformat() if appointment.appointment_date else None,
+            appointment_time=appointment.appointment_time,
+            duration=treatment_info.get('duration', 60),
+            price=treatment_info.get('price', 0),
+            notes=appointment.notes,
+            admin_notes=appointment.admin_notes,
+            status=appointment.status
+        )
+    
+    def _load_context(self, appointment: Appointment) -> AppointmentContext:
+        """Load the context stored at scheduling time, building it if none was stored"""
+        if not appointment.email_context_json:
+            return self._build_context(appointment)
+        
+        context = AppointmentContext(**orjson.loads(appointment.email_context_json))
+        context.status = appointment.status  # May have changed since scheduling
+        return context
+    
+    def _get_email_content(self, db: Session, appointment: Appointment, email_type: str) -> Dict[str, str]:
+        """Return stored email content for an appointment, generating it if none was stored"""
+        stored = db.get(ScheduledEmailContent, (appointment.id, email_type))
+        if stored:
+            return {
+                'subject': stored.subject,
+                'html_content': stored.html_content,
+                'plain_text_content': stored.plain_text_content
+            }
+        
+        return self.ai_generator.generate_email(self._load_context(appointment), email_type)
+    
+    def _pregenerate_email_content(self, appointment_ids: List[int]):
+        """Generate reminder and follow-up content with one AI call per appointment and store it"""
+        for appointment_id in appointment_ids:
+            try:
+                with SessionLocal() as db:
+                    appointment = db.get(Appointment, appointment_id)
+                    if not appointment:
+                        continue
+                    
+                    contents = self.ai_generator.generate_both(self._load_context(appointment))
+                    if not contents:
+                        continue
+                    
+                    for email_type, content in contents.items():
+                        db.merge(ScheduledEmailContent(
+                            appointment_id=appointment_id,
+                            email_type=email_type,
+                            subject=content['subject'],
+                            html_content=content['html_content'],
+                            plain_text_content=content['plain_text_content']
+                        ))
+                    db.commit()
+                
+            except Exception as e:
+                logger.error(f"Error pre-generating email content for appointment {appointment_id}: {str(e)}")
     
-    def _schedule_followup_email(self, appointment_id: int, send_time: datetime) -> bool:
-        """Schedule a follow-up email"""
+    def _prepare_email(self, email_type: str, appointment_id: int, now: Optional[datetime] = None) -> Optional[EmailMessage]:
+        """Build a reminder or follow-up email in its own database session"""
         try:
-            job_id = f"followup_{appointment_id}"
-            
-            self.scheduler.add_job(
-                func=self._send_followup_email,
-                trigger=DateTrigger(run_date=send_time),
-                args=[appointment_id],
-                id=job_id,
-                replace_existing=True
-            )
-            
-            logger.info(f"Follow-up email scheduled for appointment {appointment_id} at {send_time}")
-            return True
+            with SessionLocal() as db:
+                if email_type == 'reminder':
+                    return self._prepare_reminder_email(db, appointment_id)
+                return self._prepare_followup_email(db, appointment_id, now)
             
         except Exception as e:
-            logger.error(f"Error scheduling follow-up email: {str(e)}")
-            return False
+            logger.error(f"Error preparing {email_type} email for appointment {appointment_id}: {str(e)}")
+            return None
     
     def _send_reminder_email(self, appointment_id: int):
         """Send a reminder email for an appointment"""
-        try:
-            db = SessionLocal()
-            appointment = db.query(Appointment).filter(Appointment.id == appointment_id).first()
-            
-            if not appointment:
-                logger.error(f"Appointment {appointment_id} not found for reminder email")
-                return
-            
-            # Check if appointment is still active
-            if appointment.status in ['cancelled', 'completed']:
-                logger.info(f"Skipping reminder email for {appointment.status} appointment {appointment_id}")
-                return
-            
-            # Create appointment context
-            treatment_info = TREATMENT_TYPES.get(appointment.treatment_type, {})
-            context = AppointmentContext(
-                patient_name=appointment.patient_name,
-                patient_email=appointment.patient_email,
-                patient_phone=appointment.patient_phone,
-                treatment_type=appointment.treatment_type,
-                appointment_date=appointment.appointment_date,
-                appointment_time=appointment.appointment_time,
-                duration=treatment_info.get('duration', 60),
-                price=treatment_info.get('price', 0),
-                notes=appointment.notes,
-                admin_notes=getattr(appointment, 'admin_notes', None),
-                status=appointment.status
-            )
-            
-            # Generate email content
-            email_content = self.ai_generator.generate_reminder_email(context)
-            
-            # Create email message
-            email_message = EmailMessage(
-                to_email=appointment.patient_email,
-                to_name=appointment.patient_name,
-                subject=email_content['subject'],
-                html_content=email_content['html_content'],
-                plain_text_content=email_content['plain_text_content']
-            )
-            
-            # Send email with database session for dynamic clinic settings
-            result = self.email_service.send_email(email_message, db=db)
-            
-            # Log email
-            self._log_email(
-                db, appointment_id, 'reminder', 
-                email_message.subject, email_message.to_email, email_message.to_name, result
-            )
-            
-            db.close()
-            
-            if result['success']:
-                logger.info(f"Reminder email sent successfully for appointment {appointment_id}")
-            else:
-                logger.error(f"Failed to send reminder email for appointment {appointment_id}: {result.get('error')}")
-                
-        except Exception as e:
-            logger.error(f"Error sending reminder email for appointment {appointment_id}: {str(e)}")
+        self._send_email(appointment_id, 'reminder')
     
     def _send_followup_email(self, appointment_id: int):
         """Send a follow-up email after an appointment"""
+        self._send_email(appointment_id, 'followup')
+    
+    def _send_email(self, appointment_id: int, email_type: str):
+        """Build, send and log a single reminder or follow-up email"""
         try:
-            db = SessionLocal()
-            appointment = db.query(Appointment).filter(Appointment.id == appointment_id).first()
-            
-            if not appointment:
-                logger.error(f"Appointment {appointment_id} not found for follow-up email")
-                return
-            
-            # Only send follow-up if appointment was completed
-            if appointment.status != 'completed':
-                # Auto-update status to completed if appointment time has passed
-                appointment_datetime = datetime.strptime(
-                    f"{appointment.appointment_date} {appointment.appointment_time}",
-                    "%Y-%m-%d %H:%M"
-                )
-                
-                if datetime.now() > appointment_datetime + timedelta(hours=2):
-                    appointment.status = 'completed'
-                    db.commit()
-                    logger.info(f"Auto-updated appointment {appointment_id} status to completed")
+            with SessionLocal() as db:
+                if email_type == 'reminder':
+                    email_message = self._prepare_reminder_email(db, appointment_id)
                 else:
-                    logger.info(f"Skipping follow-up email for non-completed appointment {appointment_id}")
+                    email_message = self._prepare_followup_email(db, appointment_id)
+                
+                if not email_message:
                     return
-            
-            # Create appointment context
-            treatment_info = TREATMENT_TYPES.get(appointment.treatment_type, {})
-            context = AppointmentContext(
-                patient_name=appointment.patient_name,
-                patient_email=appointment.patient_email,
-                patient_phone=appointment.patient_phone,
-                treatment_type=appointment.treatment_type,
-                appointment_date=appointment.appointment_date,
-                appointment_time=appointment.appointment_time,
-                duration=treatment_info.get('duration', 60),
-                price=treatment_info.get('price', 0),
-                notes=appointment.notes,
-                admin_notes=getattr(appointment, 'admin_notes', None),
-                status=appointment.status
-            )
-            
-            # Generate email content
-            email_content = self.ai_generator.generate_followup_email(context)
-            
-            # Create email message
-            email_message = EmailMessage(
-                to_email=appointment.patient_email,
-                to_name=appointment.patient_name,
-                subject=email_content['subject'],
-                html_content=email_content['html_content'],
-                plain_text_content=email_content['plain_text_content']
-            )
-            
-            # Send email with database session for dynamic clinic settings
-            result = self.email_service.send_email(email_message, db=db)
-            
-            # Log email
-            self._log_email(
-                db, appointment_id, 'followup', 
-                email_message.subject, email_message.to_email, email_message.to_name, result
-            )
-            
-            db.close()
-            
-            if result['success']:
-                logger.info(f"Follow-up email sent successfully for appointment {appointment_id}")
-            else:
-                logger.error(f"Failed to send follow-up email for appointment {appointment_id}: {result.get('error')}")
                 
-        except Exception as e:
-            logger.error(f"Error sending follow-up email for appointment {appointment_id}: {str(e)}")
-    
-    def _log_email(self, db: Session, appointment_id: int, email_type: str, subject: str, to_email: str, to_name: str, result: Dict):
-        """Log email sending attempt"""
-        try:
-            email_log = EmailLog(
-                appointment_id=appointment_id,
-                email_type=email_type,
-                subject=subject,
-                to_email=to_email,
-                to_name=to_name,
-                status='sent' if result['success'] else 'failed',
-                error_message=result.get('error'),
-                message_id=result.get('message_id'),
-                sent_at=datetime.now()
-            )
+                # Send email with database session for dynamic clinic settings
+                result = self.email_service.send_email(email_message, db=db)
             
-            db.add(email_log)
-            db.commit()
+            self._record_result(appointment_id, email_type, email_message, result)
             
         except Exception as e:
-            logger.error(f"Error logging email: {str(e)}")
+            logger.error(f"Error sending {email_type} email for appointment {appointment_id}: {str(e)}")
+    
+    def _record_result(self, appointment_id: int, email_type: str, email_message: EmailMessage, result: Dict):
+        """Log the outcome of a send"""
+        self._log_email(
+            appointment_id, email_type,
+            email_message.subject, email_message.to_email, email_message.to_name, result
+        )
+        
+        if result['success']:
+            logger.info(f"{email_type.capitalize()} email sent successfully for appointment {appointment_id}")
+        else:
+            logger.error(f"Failed to send {email_type} email for appointment {appointment_id}: {result.get('error')}")
+    
+    def _log_email(self, appointment_id: int, email_type: str, subject: str, to_email: str, to_name: str, result: Dict):
+        """Queue an email sending attempt to be logged with the next batch"""
+        email_log = {
+            'appointment_id': appointment_id,
+            'email_type': email_type,
+            'subject': subject,
+            'to_email': to_email,
+            'to_name': to_name,
+            'status': 'sent' if result['success'] else 'failed',
+            'error_message': result.get('error'),
+            'message_id': result.get('message_id'),
+            'sent_at': datetime.now(timezone.utc)
+        }
+        
+        with self._email_log_lock:
+            self._pending_email_logs.append(email_log)
+            pending = len(self._pending_email_logs)
+        
+        # Flush right away when the batch is full or no flush job is running
+        if pending >= EMAIL_LOG_BATCH_SIZE or not (self.scheduler and self.scheduler.running):
+            self._flush_email_logs()
     
-    def _cleanup_old_jobs(self):
-        """Clean up old completed jobs"""
+    def _flush_email_logs(self):
+        """Write all buffered email logs in a single insert and commit"""
+        with self._email_log_lock:
+            if not self._pending_email_logs:
+                return
+            rows = list(self._pending_email_logs)
+            self._pending_email_logs.clear()
+        
         try:
-            # Remove jobs older than 7 days
-            cutoff_date = datetime.now() - timedelta(days=7)
-            
-            jobs = self.scheduler.get_jobs()
-            removed_count = 0
-            
-            for job in jobs:
-                if job.next_run_time and job.next_run_time < cutoff_date:
-                    self.scheduler.remove_job(job.id)
-                    removed_count += 1
-            
-            logger.info(f"Cleaned up {removed_count} old scheduled jobs")
+            with SessionLocal() as db:
+                db.bulk_insert_mappings(EmailLog, rows)
+                db.commit()
             
         except Exception as e:
-            logger.error(f"Error cleaning up old jobs: {str(e)}")
+            logger.error(f"Error logging {len(rows)} emails: {str(e)}")
     
     def cancel_appointment_emails(self, appointment_id: int) -> bool:
         """Cancel scheduled emails for an appointment"""
         try:
-            reminder_job_id = f"reminder_{appointment_id}"
-            followup_job_id = f"followup_{appointment_id}"
-            
-            cancelled_count = 0
-            
-            # Cancel reminder email
-            try:
-                self.scheduler.remove_job(reminder_job_id)
-                cancelled_count += 1
-                logger.info(f"Cancelled reminder email for appointment {appointment_id}")
-            except:
-                pass  # Job might not exist or already completed
-            
-            # Cancel follow-up email
-            try:
-                self.scheduler.remove_job(followup_job_id)
-                cancelled_count += 1
-                logger.info(f"Cancelled follow-up email for appointment {appointment_id}")
-            except:
-                pass  # Job might not exist or already completed
+            with SessionLocal() as db:
+                reminder_cancelled = db.query(Appointment).filter(
+                    Appointment.id == appointment_id,
+                    Appointment.reminder_due_at.isnot(None),
+                    Appointment.reminder_sent == False
+                ).update({Appointment.reminder_due_at: None}, synchronize_session=False)
+                if reminder_cancelled:
+                    logger.info(f"Cancelled reminder email for appointment {appointment_id}")
+                
+                followup_cancelled = db.query(Appointment).filter(
+                    Appointment.id == appointment_id,
+                    Appointment.followup_due_at.isnot(None),
+                    Appointment.followup_sent == False
+                ).update({Appointment.followup_due_at: None}, synchronize_session=False)
+                if followup_cancelled:
+                    logger.info(f"Cancelled follow-up email for appointment {appointment_id}")
+                
+                db.commit()
             
-            return cancelled_count > 0
+            return reminder_cancelled + followup_cancelled > 0
             
         except Exception as e:
             logger.error(f"Error cancelling emails for appointment {appointment_id}: {str(e)}")
@@ -390,11 +567,17 @@ class EmailScheduler:
             'ai_generator_available': self.ai_generator.is_configured()
         }
 
-# Global email scheduler instance
-email_scheduler = EmailScheduler()
+# Global email scheduler instance, created on first use
+email_scheduler: Optional[EmailScheduler] = None
+_email_scheduler_lock = threading.Lock()
 
 def get_email_scheduler() -> EmailScheduler:
     """Get the global email scheduler instance"""
+    global email_scheduler
+    if email_scheduler is None:
+        with _email_scheduler_lock:
+            if email_scheduler is None:
+                email_scheduler = EmailScheduler()
     return email_scheduler
 
 # Note: Scheduler will be started by the FastAPI app startup event
@@ -1,16 +1,26 @@
 import os
+import asyncio
 import logging
 from typing import Dict, List, Optional
 from dataclasses import dataclass
+from functools import lru_cache
 from abc import ABC, abstractmethod
+import httpx
+import orjson
 import requests
-from sendgrid import SendGridAPIClient
-from sendgrid.helpers.mail import Mail, From, To, Subject, HtmlContent, PlainTextContent
+from requests.adapters import HTTPAdapter
 from sqlalchemy.orm import Session
 
+from clinic_settings_endpoints import get_all_settings_dict
+
 # Configure logging
 logger = logging.getLogger(__name__)
 
+SENDGRID_SEND_URL = "https://api.sendgrid.com/v3/mail/send"
+SENDGRID_MAX_CONNECTIONS = 100
+SENDGRID_TIMEOUT = 10  # seconds
+SENDGRID_POOL_SIZE = 20
+
 @dataclass
 class EmailMessage:
     """Email message data class"""
@@ -38,6 +48,10 @@ class EmailServiceBase(ABC):
         """Send an email message"""
         pass
     
+    async def send_emails_async(self, messages: List[EmailMessage]) -> List[Dict]:
+        """Send several messages concurrently; services can override with a native async client"""
+        return await asyncio.gather(*(asyncio.to_thread(self.send_email, message) for message in messages))
+    
     def health_check(self) -> Dict:
         """Check the health of the email service"""
         return {
@@ -56,10 +70,13 @@ class SendGridService(EmailServiceBase):
         if not self.api_key:
             logger.warning("SendGrid API key not found in environment variables")
         
+        # One keep-alive session per process so sends reuse TCP/TLS connections
         if self.api_key:
-            self.client = SendGridAPIClient(api_key=self.api_key)
+            self.session = requests.Session()
+            self.session.headers.update({"Authorization": f"Bearer {self.api_key}", "Content-Type": "application/json"})
+            self.session.mount("https://", HTTPAdapter(pool_connections=SENDGRID_POOL_SIZE, pool_maxsize=SENDGRID_POOL_SIZE))
         else:
-            self.client = None
+            self.session = None
     
     def is_configured(self) -> bool:
         """Check if SendGrid is properly configured"""
@@ -77,7 +94,6 @@ class SendGridService(EmailServiceBase):
             from_name = message.from_name
             
             if db and not from_email:
-                from clinic_settings_endpoints import get_all_settings_dict
                 clinic_settings = get_all_settings_dict(db)
                 from_email = clinic_settings.get('clinic_email', self.fallback_from_email)
                 from_name = clinic_settings.get('clinic_name', self.fallback_from_name)
@@ -88,31 +104,9 @@ class SendGridService(EmailServiceBase):
             if not from_name:
                 from_name = self.fallback_from_name
             
-            # Create mail object
-            mail = Mail(
-                from_email=From(from_email, from_name),
-                to_emails=To(message.to_email, message.to_name),
-                subject=Subject(message.subject),
-                html_content=HtmlContent(message.html_content),
-                plain_text_content=PlainTextContent(message.plain_text_content)
-            )
-            
-            # Add CC emails if provided
-            if message.cc_emails:
-                for cc_email in message.cc_emails:
-                    mail.add_cc(cc_email)
-            
-            # Add BCC emails if provided
-            if message.bcc_emails:
-                for bcc_email in message.bcc_emails:
-                    mail.add_bcc(bcc_email)
-            
-            # Add reply-to if provided
-            if message.reply_to:
-                mail.reply_to = message.reply_to
-            
             # Send email
-            response = self.client.send(mail)
+            payload = self._build_payload(message, from_email, from_name)
+            response = self.session.post(SENDGRID_SEND_URL, data=orjson.dumps(payload), timeout=SENDGRID_TIMEOUT)
             
             success = response.status_code in [200, 201, 202]
             
@@ -124,17 +118,78 @@ class SendGridService(EmailServiceBase):
                     "status_code": response.status_code
                 }
             else:
-                logger.error(f"Failed to send email: {response.status_code} - {response.body}")
+                logger.error(f"Failed to send email: {response.status_code} - {response.text}")
                 return {
                     "success": False,
                     "error": f"SendGrid error: {response.status_code}",
-                    "details": response.body
+                    "details": response.text
                 }
                 
         except Exception as e:
             logger.error(f"SendGrid error: {str(e)}")
             return {"success": False, "error": str(e)}
     
+    def _build_payload(self, message: EmailMessage, from_email: Optional[str] = None, from_name: Optional[str] = None) -> Dict:
+        """Build a SendGrid v3 mail/send request body"""
+        personalization = {"to": [{"email": message.to_email, "name": message.to_name}]}
+        if message.cc_emails:
+            personalization["cc"] = [{"email": cc_email} for cc_email in message.cc_emails]
+        if message.bcc_emails:
+            personalization["bcc"] = [{"email": bcc_email} for bcc_email in message.bcc_emails]
+        
+        payload = {
+            "personalizations": [personalization],
+            "from": {
+                "email": from_email or message.from_email or self.fallback_from_email,
+                "name": from_name or message.from_name or self.fallback_from_name
+            },
+            "subject": message.subject,
+            "content": [
+                {"type": "text/plain", "value": message.plain_text_content},
+                {"type": "text/html", "value": message.html_content}
+            ]
+        }
+        if message.reply_to:
+            payload["reply_to"] = {"email": message.reply_to}
+        
+        return payload
+    
+    async def send_emails_async(self, messages: List[EmailMessage]) -> List[Dict]:
+        """Send several messages concurrently over one pooled HTTP client"""
+        if not self.is_configured():
+            logger.error("SendGrid not configured")
+            return [{"success": False, "error": "SendGrid not configured"} for _ in messages]
+        
+        limits = httpx.Limits(max_connections=SENDGRID_MAX_CONNECTIONS, keepalive_expiry=60)
+        headers = {"Authorization": f"Bearer {self.api_key}", "Content-Type": "application/json"}
+        
+        async with httpx.AsyncClient(headers=headers, limits=limits, timeout=SENDGRID_TIMEOUT) as client:
+            return await asyncio.gather(*(self._post_async(client, message) for message in messages))
+    
+    async def _post_async(self, client: httpx.AsyncClient, message: EmailMessage) -> Dict:
+        """Post a single message with the shared async client"""
+        try:
+            response = await client.post(SENDGRID_SEND_URL, content=orjson.dumps(self._build_payload(message)))
+            
+            if response.status_code in [200, 201, 202]:
+                logger.info(f"Email sent successfully to {message.to_email}")
+                return {
+                    "success": True,
+                    "message_id": response.headers.get('X-Message-Id'),
+                    "status_code": response.status_code
+                }
+            
+            logger.error(f"Failed to send email: {response.status_code} - {response.text}")
+            return {
+                "success": False,
+                "error": f"SendGrid error: {response.status_code}",
+                "details": response.text
+            }
+            
+        except Exception as e:
+            logger.error(f"SendGrid error: {str(e)}")
+            return {"success": False, "error": str(e)}
+    
     def get_delivery_status(self, message_id: str) -> Dict:
         """Get delivery status for a message (requires SendGrid Event Webhook)"""
         # This would typically require webhook setup for real-time status
@@ -149,6 +204,12 @@ class EmailServiceManager:
             "sendgrid": SendGridService()
         }
         
+        # Which services accept a database session for dynamic settings
+        self._service_supports_db = {
+            name: 'db' in service.send_email.__code__.co_varnames
+            for name, service in self.services.items()
+        }
+        
         # Determine primary service based on configuration
         self.primary_service = self._get_primary_service()
         
@@ -183,11 +244,25 @@ class EmailServiceManager:
             return {"success": False, "error": "No configured email service available"}
         
         # Pass database session to service if it supports dynamic settings
-        if hasattr(service, 'send_email') and 'db' in service.send_email.__code__.co_varnames:
+        if self._service_supports_db[service_name]:
             return service.send_email(message, db)
         else:
             return service.send_email(message)
     
+    async def send_emails_async(self, messages: List[EmailMessage], service_name: str = None) -> List[Dict]:
+        """Send several messages concurrently using specified service or primary service"""
+        service_name = service_name or self.primary_service
+        
+        if service_name not in self.services:
+            return [{"success": False, "error": f"Unknown email service: {service_name}"} for _ in messages]
+        
+        service = self.services[service_name]
+        
+        if not service.is_configured():
+            return [{"success": False, "error": "No configured email service available"} for _ in messages]
+        
+        return await service.send_emails_async(messages)
+    
     def get_available_services(self) -> List[str]:
         """Get list of available and configured email services"""
         return [name for name, service in self.services.items() if service.is_configured()]
@@ -208,9 +283,7 @@ class EmailServiceManager:
             "available_services": self.get_available_services()
         }
 
-# Global email service manager instance
-email_manager = EmailServiceManager()
-
+@lru_cache(maxsize=1)
 def get_email_service() -> EmailServiceManager:
     """Get the global email service manager instance"""
-    return email_manager
\ No newline at end of file
+    return EmailServiceManager()
\ No newline at end of file
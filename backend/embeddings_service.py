@@ -1,10 +1,15 @@
+import gc
 import os
-import json
+import re
+import math
+import hashlib
 import numpy as np
 from typing import List, Dict, Optional, Tuple
+from functools import lru_cache
+from sqlalchemy import update
 from sqlalchemy.orm import Session
 import logging
-from datetime import datetime
+import threading
 
 from models import KnowledgeBase
 from database import get_db
@@ -18,6 +23,116 @@ except ImportError:
     SENTENCE_TRANSFORMERS_AVAILABLE = False
     logger.warning("sentence-transformers not installed. Install with: pip install sentence-transformers")
 
+try:
+    from model2vec import StaticModel
+    MODEL2VEC_AVAILABLE = True
+except ImportError:
+    MODEL2VEC_AVAILABLE = False
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    
+    def njit(*args, **kwargs):
+        """Run the decorated function as plain Python when numba is not installed"""
+        def decorator(func):
+            return func
+        return decorator
+
+# Inference backend for the SentenceTransformer model: 'openvino' or 'onnx' (both INT8 quantized) or 'torch'
+EMBEDDINGS_BACKEND = os.getenv("EMBEDDINGS_BACKEND", "openvino").lower()
+# Quantized ONNX weights inside the model repo (or inside ONNX_MODEL_PATH when self-exported;
+# keep that on a volume shared by all workers so the page cache holds a single copy)
+ONNX_MODEL_FILE = os.getenv("ONNX_MODEL_FILE", "onnx/model_qint8_avx512_vnni.onnx")
+ONNX_MODEL_PATH = os.getenv("ONNX_MODEL_PATH")
+OPENVINO_MODEL_FILE = os.getenv("OPENVINO_MODEL_FILE", "openvino/openvino_model_qint8_quantized.xml")
+# Keep OpenVINO from spawning more threads than each worker should use
+OV_NUM_STREAMS = os.getenv("OV_NUM_STREAMS", "1")
+OV_INFERENCE_NUM_THREADS = os.getenv("OV_INFERENCE_NUM_THREADS")
+# Distilled static embedding model used when SentenceTransformers can't be loaded
+STATIC_EMBEDDING_MODEL = os.getenv("STATIC_EMBEDDING_MODEL", "minishlab/M2V_base_output")
+# Inference threads per worker process (PyTorch and ONNX Runtime); defaults to splitting the CPUs across WEB_CONCURRENCY workers
+EMBEDDINGS_NUM_THREADS = int(os.getenv(
+    "EMBEDDINGS_NUM_THREADS",
+    max(1, (os.cpu_count() or 1) // max(1, int(os.getenv("WEB_CONCURRENCY", "1"))))
+))
+# Texts per forward pass when encoding in bulk (rebuilds, corpus loads)
+EMBEDDING_BATCH_SIZE = 64
+GPU_EMBEDDING_BATCH_SIZE = 128
+# Rows per bulk insert/commit when storing many QA pairs
+EMBEDDING_INSERT_CHUNK_SIZE = 500
+# Recently encoded texts (mostly repeated user queries) kept in memory
+EMBEDDING_CACHE_SIZE = 4096
+
+def embedding_to_bytes(embedding) -> bytes:
+    """Serialize an embedding as raw float32 bytes for the embedding_vector column"""
+    return np.asarray(embedding, dtype=np.float32).tobytes()
+
+def embedding_from_bytes(value: bytes) -> np.ndarray:
+    """Read a stored embedding back as a float32 array without copying"""
+    return np.frombuffer(value, dtype=np.float32)
+
+def qa_text_hash(question: str, answer: str) -> str:
+    """SHA-1 of the question and answer a QA pair's embedding is generated from"""
+    return hashlib.sha1(f"{question}\0{answer}".encode()).hexdigest()
+
+# Whitespace that _clean_text must collapse: runs of 2+ or any whitespace other than a plain space
+_WHITESPACE_RE = re.compile(r'\s+')
+_UNCLEAN_WHITESPACE_RE = re.compile(r'\s{2,}|[^\S ]')
+
+# Text features used by the basic-text-similarity fallback
+COMMON_BIGRAMS = ['th', 'he', 'in', 'er', 'an', 're', 'ed', 'nd', 'on', 'en']
+DENTAL_KEYWORDS = ['tooth', 'teeth', 'dental', 'gum', 'cavity', 'filling', 'crown', 'root', 'cleaning', 'hygiene']
+
+def _text_codes(text: str) -> np.ndarray:
+    """Unicode code points of a string as a uint32 array (one element per character)"""
+    return np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32)
+
+# Common bigrams packed as first * 128 + second (all are ASCII)
+_BIGRAM_KEYS = np.array([ord(bigram[0]) * 128 + ord(bigram[1]) for bigram in COMMON_BIGRAMS], dtype=np.int64)
+_KEYWORD_CODES = _text_codes(''.join(DENTAL_KEYWORDS))
+_KEYWORD_OFFSETS = np.cumsum([0] + [len(keyword) for keyword in DENTAL_KEYWORDS]).astype(np.int64)
+
+@njit(cache=True)
+def _char_histogram(codes):
+    """Count occurrences of a-z in lowercased text"""
+    histogram = np.zeros(26)
+    for code in codes:
+        if 97 <= code <= 122:
+            histogram[code - 97] += 1
+    return histogram
+
+def _bigram_counts(codes: np.ndarray) -> np.ndarray:
+    """Count every position where each common bigram occurs, from one histogram of ASCII pairs"""
+    firsts = codes[:-1]
+    seconds = codes[1:]
+    ascii_pairs = (firsts < 128) & (seconds < 128)
+    keys = firsts[ascii_pairs].astype(np.int64) * 128 + seconds[ascii_pairs]
+    return np.bincount(keys, minlength=128 * 128)[_BIGRAM_KEYS]
+
+@njit(cache=True)
+def _keyword_counts(codes, keyword_codes, offsets):
+    """Count non-overlapping occurrences of each keyword, like str.count"""
+    counts = np.zeros(offsets.shape[0] - 1)
+    for k in range(offsets.shape[0] - 1):
+        start = offsets[k]
+        length = offsets[k + 1] - start
+        i = 0
+        while i <= codes.shape[0] - length:
+            matched = True
+            for j in range(length):
+                if codes[i + j] != keyword_codes[start + j]:
+                    matched = False
+                    break
+            if matched:
+                counts[k] += 1
+                i += length
+            else:
+                i += 1
+    return counts
+
 class EmbeddingsService:
     """Service for generating and managing embeddings for vector search using Sentence Transformers
     
@@ -25,15 +140,26 @@ class EmbeddingsService:
     optimized for semantic similarity tasks including medical/dental text.
     """
     
+    __slots__ = (
+        'model_name', 'embedding_dimension', 'max_tokens', 'device', 'batch_size',
+        'model', 'static_model', 'is_available', '_cached_encode'
+    )
+    
     def __init__(self, model_name: str = "all-MiniLM-L6-v2"):
         self.model_name = model_name
         self.embedding_dimension = 384  # all-MiniLM-L6-v2 produces 384-dim embeddings
         self.max_tokens = 512  # Model's max sequence length
+        self.device = "cpu"
+        self.batch_size = EMBEDDING_BATCH_SIZE
+        self.model = None
+        self.static_model = None
+        self._cached_encode = lru_cache(maxsize=EMBEDDING_CACHE_SIZE)(self._encode_text)
         
         if SENTENCE_TRANSFORMERS_AVAILABLE:
             try:
                 logger.info(f"Loading SentenceTransformer model: {model_name}")
-                self.model = SentenceTransformer(model_name)
+                self.model = self._load_model(model_name)
+                self._ensure_fast_tokenizer(model_name)
                 self.is_available = True
                 logger.info("Embeddings service initialized successfully")
             except Exception as e:
@@ -44,94 +170,213 @@ class EmbeddingsService:
             self.is_available = False
             self._fallback_to_basic()
     
+    def _load_model(self, model_name: str) -> "SentenceTransformer":
+        """Load the model on the configured backend, falling back to PyTorch"""
+        if self._cuda_available():
+            # FP16 on tensor cores; larger batches keep the GPU busy
+            model = SentenceTransformer(model_name, device="cuda").half()
+            self.device = "cuda"
+            self.batch_size = GPU_EMBEDDING_BATCH_SIZE
+            logger.info("Using CUDA backend with FP16 weights")
+            return model
+        
+        if EMBEDDINGS_BACKEND == "openvino":
+            try:
+                import openvino  # noqa: F401  (fall back cleanly when OpenVINO is not installed)
+                
+                ov_config = {"NUM_STREAMS": OV_NUM_STREAMS}
+                if OV_INFERENCE_NUM_THREADS:
+                    ov_config["INFERENCE_NUM_THREADS"] = OV_INFERENCE_NUM_THREADS
+                
+                model = SentenceTransformer(
+                    model_name,
+                    backend="openvino",
+                    model_kwargs={"file_name": OPENVINO_MODEL_FILE, "ov_config": ov_config}
+                )
+                logger.info(f"Using OpenVINO backend with {OPENVINO_MODEL_FILE}")
+                return model
+            except Exception as e:
+                logger.warning(f"Failed to load OpenVINO model, using PyTorch backend: {e}")
+        
+        elif EMBEDDINGS_BACKEND == "onnx":
+            try:
+                import onnxruntime as ort
+                
+                session_options = ort.SessionOptions()
+                session_options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+                session_options.intra_op_num_threads = EMBEDDINGS_NUM_THREADS
+                # No private arena or memory-pattern buffers, so each worker's footprint is
+                # mostly the read-only model file pages the kernel shares between processes
+                session_options.enable_cpu_mem_arena = False
+                session_options.enable_mem_pattern = False
+                
+                model = SentenceTransformer(
+                    ONNX_MODEL_PATH or model_name,
+                    backend="onnx",
+                    model_kwargs={"file_name": ONNX_MODEL_FILE, "session_options": session_options}
+                )
+                logger.info(f"Using ONNX Runtime backend with {ONNX_MODEL_FILE}")
+                return model
+            except Exception as e:
+                logger.warning(f"Failed to load ONNX model, using PyTorch backend: {e}")
+        
+        self._configure_torch_threads()
+        return SentenceTransformer(model_name)
+    
+    def _ensure_fast_tokenizer(self, model_name: str):
+        """Swap in the Rust (fast) tokenizer if the model came with a Python one"""
+        tokenizer = getattr(self.model, 'tokenizer', None)
+        if tokenizer is None or getattr(tokenizer, 'is_fast', False):
+            return
+        
+        try:
+            from transformers import AutoTokenizer
+            
+            self.model.tokenizer = AutoTokenizer.from_pretrained(
+                tokenizer.name_or_path or model_name, use_fast=True
+            )
+            logger.info("Replaced slow tokenizer with fast tokenizer")
+        except Exception as e:
+            logger.warning(f"Could not load fast tokenizer, keeping the slow one: {e}")
+    
+    def _cuda_available(self) -> bool:
+        """Check for a usable CUDA GPU without requiring torch to be importable"""
+        try:
+            import torch
+            
+            return torch.cuda.is_available()
+        except ImportError:
+            return False
+    
+    def _configure_torch_threads(self):
+        """Limit PyTorch threads so several workers don't oversubscribe the CPUs"""
+        try:
+            import torch
+            
+            torch.set_num_threads(EMBEDDINGS_NUM_THREADS)
+            torch.set_num_interop_threads(1)
+        except RuntimeError as e:
+            # Interop threads can only be set before the first parallel op in the process
+            logger.warning(f"Could not configure PyTorch threads: {e}")
+    
+    def warmup(self):
+        """Run one dummy encode so the first real request doesn't pay for kernel selection"""
+        if self.is_available:
+            self.model.encode(["warmup"], convert_to_numpy=True)
+            logger.info("Embeddings model warmed up")
+    
     def _fallback_to_basic(self):
-        """Fallback to basic text similarity if SentenceTransformers is not available"""
+        """Fallback to static embeddings, or basic text similarity, if SentenceTransformers is not available"""
+        # Drop anything a failed model load left behind (weights may already be mapped)
+        self.model = None
+        gc.collect()
+        
+        if MODEL2VEC_AVAILABLE:
+            try:
+                self.static_model = StaticModel.from_pretrained(STATIC_EMBEDDING_MODEL)
+                self.model_name = STATIC_EMBEDDING_MODEL
+                self.embedding_dimension = self.static_model.dim
+                self.is_available = False
+                logger.warning(f"Falling back to static embeddings from {STATIC_EMBEDDING_MODEL}")
+                return
+            except Exception as e:
+                logger.error(f"Failed to load static embedding model: {e}")
+        
         logger.warning("Falling back to basic text similarity approach")
         self.model_name = "basic-text-similarity"
         self.embedding_dimension = 128
         self.is_available = False
         
-    def generate_embedding(self, text: str) -> List[float]:
+    def generate_embedding(self, text: str) -> np.ndarray:
         """Generate embedding for a single text using SentenceTransformers or fallback to basic approach"""
         try:
             # Clean text
             cleaned_text = self._clean_text(text)
             
-            if self.is_available:
-                # Use SentenceTransformers for proper embeddings
-                embedding = self.model.encode(cleaned_text, convert_to_tensor=False)
-                return embedding.tolist()
-            else:
-                # Fallback to basic approach
-                return self._generate_basic_embedding(cleaned_text)
+            return self._cached_encode(cleaned_text)
             
         except Exception as e:
             logger.error(f"Error generating embedding: {e}")
             raise
     
-    def _generate_basic_embedding(self, text: str) -> List[float]:
+    def _encode_text(self, cleaned_text: str) -> np.ndarray:
+        """Encode one cleaned text; results are cached, so the array is made read-only"""
+        if self.is_available:
+            # Use SentenceTransformers for proper embeddings
+            embedding = self.model.encode(cleaned_text, convert_to_numpy=True, normalize_embeddings=True)
+        elif self.static_model is not None:
+            # Static token embeddings: a lookup and mean, no transformer forward
+            embedding = self._encode_static([cleaned_text])[0]
+        else:
+            # Fallback to basic approach
+            embedding = self._generate_basic_embedding(cleaned_text)
+        
+        embedding.setflags(write=False)
+        return embedding
+    
+    def _encode_static(self, cleaned_texts: List[str]) -> np.ndarray:
+        """Encode texts with the static fallback model as unit-length float32 rows"""
+        embeddings = np.asarray(self.static_model.encode(cleaned_texts), dtype=np.float32)
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        return embeddings / np.maximum(norms, 1e-12)
+    
+    def _generate_basic_embedding(self, text: str) -> np.ndarray:
         """Generate a basic embedding using simple text features"""
         # This is a simplified approach - in production, use proper embeddings
-        
-        # Character frequency features
-        char_freq = {}
-        for char in text.lower():
-            if char.isalpha():
-                char_freq[char] = char_freq.get(char, 0) + 1
+        codes = _text_codes(text)
+        lowered_codes = _text_codes(text.lower())
+        words = text.split()
         
         # Create a 128-dimensional vector based on various text features
-        embedding = [0.0] * 128
+        embedding = np.zeros(128, dtype=np.float32)
         
         # Character frequency features (first 26 dimensions)
-        for i, char in enumerate('abcdefghijklmnopqrstuvwxyz'):
-            if i < 26:
-                embedding[i] = char_freq.get(char, 0) / max(len(text), 1)
+        embedding[0:26] = _char_histogram(lowered_codes) / max(len(text), 1)
         
         # Word length features
-        words = text.split()
         if words:
             embedding[26] = len(words) / 100.0  # Number of words
             embedding[27] = sum(len(word) for word in words) / len(words) / 10.0  # Average word length
         
         # Basic n-gram features (simplified)
-        bigrams = [text[i:i+2] for i in range(len(text)-1)]
-        common_bigrams = ['th', 'he', 'in', 'er', 'an', 're', 'ed', 'nd', 'on', 'en']
-        for i, bigram in enumerate(common_bigrams):
-            if i < 10:
-                embedding[28 + i] = bigrams.count(bigram) / max(len(bigrams), 1)
+        embedding[28:38] = _bigram_counts(codes) / max(len(text) - 1, 1)
         
         # Text length features
         embedding[38] = len(text) / 1000.0  # Text length
         embedding[39] = len(text.split('.')) / 10.0  # Sentence count
         
         # Dental-specific keywords (for domain relevance)
-        dental_keywords = ['tooth', 'teeth', 'dental', 'gum', 'cavity', 'filling', 'crown', 'root', 'cleaning', 'hygiene']
-        for i, keyword in enumerate(dental_keywords):
-            if i < 10:
-                embedding[40 + i] = text.lower().count(keyword) / max(len(words), 1)
+        embedding[40:50] = _keyword_counts(lowered_codes, _KEYWORD_CODES, _KEYWORD_OFFSETS) / max(len(words), 1)
         
         # Normalize the embedding
         norm = np.linalg.norm(embedding)
         if norm > 0:
-            embedding = [x / norm for x in embedding]
+            embedding /= norm
         
         return embedding
     
-    def generate_embeddings_batch(self, texts: List[str]) -> List[List[float]]:
+    def generate_embeddings_batch(self, texts: List[str]) -> np.ndarray:
         """Generate embeddings for multiple texts in batch (more efficient than individual calls)"""
         try:
             if self.is_available:
                 # Use SentenceTransformers batch processing for efficiency
                 cleaned_texts = [self._clean_text(text) for text in texts]
-                embeddings = self.model.encode(cleaned_texts, convert_to_tensor=False, batch_size=32)
-                return embeddings.tolist()
+                return self.model.encode(
+                    cleaned_texts,
+                    batch_size=self.batch_size,
+                    convert_to_numpy=True,
+                    normalize_embeddings=True,
+                    show_progress_bar=False
+                )
+            elif self.static_model is not None:
+                return self._encode_static([self._clean_text(text) for text in texts])
             else:
                 # Fallback to individual processing
                 embeddings = []
                 for text in texts:
                     embedding = self.generate_embedding(text)
                     embeddings.append(embedding)
-                return embeddings
+                return np.vstack(embeddings) if embeddings else np.empty((0, self.embedding_dimension), dtype=np.float32)
             
         except Exception as e:
             logger.error(f"Error generating batch embeddings: {e}")
@@ -142,15 +387,17 @@ class EmbeddingsService:
         if not text:
             return ""
         
-        # Remove excessive whitespace
-        text = ' '.join(text.split())
+        # Remove excessive whitespace (most texts are already clean)
+        if _UNCLEAN_WHITESPACE_RE.search(text):
+            text = _WHITESPACE_RE.sub(' ', text)
+        text = text.strip()
         
         # Truncate if too long (SentenceTransformers typically handle ~512 tokens)
         if self.is_available:
-            # More accurate token-based truncation for transformer models
-            words = text.split()
-            if len(words) > self.max_tokens:
-                text = ' '.join(words[:self.max_tokens])
+            # More accurate token-based truncation for transformer models;
+            # words are single-space separated here, so count spaces before splitting
+            if text.count(' ') >= self.max_tokens:
+                text = ' '.join(text.split(' ')[:self.max_tokens])
                 logger.warning(f"Text truncated to {self.max_tokens} tokens")
         else:
             # Character-based truncation for basic approach
@@ -161,18 +408,41 @@ class EmbeddingsService:
         
         return text
     
-    def embed_qa_pair(self, question: str, answer: str) -> List[float]:
+    def embed_qa_pair(self, question: str, answer: str) -> np.ndarray:
         """Generate embedding for a QA pair by combining question and answer"""
-        combined_text = f"Q: {question}\nA: {answer}"
-        return self.generate_embedding(combined_text)
+        return self.embed_qa_pairs([question], [answer])[0]
+    
+    def embed_qa_pairs(self, questions: List[str], answers: List[str]) -> np.ndarray:
+        """Embed QA pairs as the normalized mean of their question and answer embeddings
+        
+        Encoding the two separately keeps long answers from being truncated away
+        behind the question, and shorter sequences are cheaper to attend over.
+        All questions and answers go through the model in a single batch.
+        """
+        embeddings = self.generate_embeddings_batch(list(questions) + list(answers)).astype(np.float32)
+        combined = embeddings[:len(questions)] + embeddings[len(questions):]
+        norms = np.linalg.norm(combined, axis=1, keepdims=True)
+        return combined / np.maximum(norms, 1e-12)
     
-    def cosine_similarity(self, vec1: List[float], vec2: List[float]) -> float:
-        """Calculate cosine similarity between two vectors"""
+    def cosine_similarity(self, vec1: List[float], vec2: List[float], normalized: bool = False) -> float:
+        """Calculate cosine similarity between two vectors
+        
+        Pass normalized=True when both vectors are unit length (everything this
+        service generates is) to reduce it to a single dot product.
+        """
         try:
-            a = np.array(vec1)
-            b = np.array(vec2)
+            a = np.asarray(vec1, dtype=np.float32)
+            b = np.asarray(vec2, dtype=np.float32)
+            
+            if normalized:
+                return float(np.dot(a, b))
+            
+            # One sqrt over both sums of squares instead of two np.linalg.norm calls
+            denominator = math.sqrt(float(np.vdot(a, a)) * float(np.vdot(b, b)))
+            if denominator == 0:
+                return 0.0
             
-            return np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b))
+            return float(np.dot(a, b) / denominator)
             
         except Exception as e:
             logger.error(f"Error calculating cosine similarity: {e}")
@@ -193,8 +463,10 @@ class EmbeddingsService:
                 category=category,
                 source=source,
                 source_url=source_url,
-                embedding_vector=json.dumps(embedding),
-                embedding_model=self.model_name
+                embedding_vector=embedding_to_bytes(embedding),
+                embedding_model=self.model_name,
+                embedding_normalized=True,
+                embedding_text_hash=qa_text_hash(question, answer)
             )
             
             db.add(kb_entry)
@@ -216,15 +488,19 @@ class EmbeddingsService:
             if not kb_entry:
                 return False
             
-            # Generate new embedding
-            embedding = self.embed_qa_pair(question, answer)
+            # Only re-encode when the text or model changed
+            text_hash = qa_text_hash(question, answer)
+            if (kb_entry.embedding_text_hash != text_hash or kb_entry.embedding_model != self.model_name
+                    or not kb_entry.embedding_vector):
+                embedding = self.embed_qa_pair(question, answer)
+                kb_entry.embedding_vector = embedding_to_bytes(embedding)
+                kb_entry.embedding_model = self.model_name
+                kb_entry.embedding_normalized = True
+                kb_entry.embedding_text_hash = text_hash
             
             # Update entry
             kb_entry.question = question
             kb_entry.answer = answer
-            kb_entry.embedding_vector = json.dumps(embedding)
-            kb_entry.embedding_model = self.model_name
-            kb_entry.updated_at = datetime.now()
             
             db.commit()
             logger.info(f"Updated QA pair embedding: {kb_id}")
@@ -235,75 +511,113 @@ class EmbeddingsService:
             db.rollback()
             return False
     
-    def get_embedding_from_db(self, kb_entry: KnowledgeBase) -> List[float]:
+    def get_embedding_from_db(self, kb_entry: KnowledgeBase) -> Optional[np.ndarray]:
         """Extract embedding vector from database entry"""
         try:
             if not kb_entry.embedding_vector:
-                return []
+                return None
             
-            return json.loads(kb_entry.embedding_vector)
+            return embedding_from_bytes(kb_entry.embedding_vector)
             
         except Exception as e:
             logger.error(f"Error parsing embedding from DB: {e}")
-            return []
+            return None
     
-    def batch_store_embeddings(self, db: Session, qa_pairs: List[Dict]) -> List[KnowledgeBase]:
-        """Store multiple QA pairs with embeddings in batch"""
+    def batch_store_embeddings(self, db: Session, qa_pairs: List[Dict]) -> int:
+        """Store multiple QA pairs with embeddings in batch, returning the number stored
+        
+        Rows are bulk inserted and committed in chunks, so a failure part way
+        through leaves the earlier chunks stored.
+        """
         try:
-            # Prepare texts for batch embedding
-            texts = [f"Q: {pair['question']}\nA: {pair['answer']}" for pair in qa_pairs]
-            
             # Generate embeddings in batch
-            embeddings = self.generate_embeddings_batch(texts)
+            embeddings = self.embed_qa_pairs(
+                [pair['question'] for pair in qa_pairs],
+                [pair['answer'] for pair in qa_pairs]
+            )
             
-            # Create database entries
-            kb_entries = []
-            for i, pair in enumerate(qa_pairs):
-                kb_entry = KnowledgeBase(
-                    question=pair['question'],
-                    answer=pair['answer'],
-                    category=pair.get('category'),
-                    source=pair.get('source', 'user_defined'),
-                    source_url=pair.get('source_url'),
-                    embedding_vector=json.dumps(embeddings[i]),
-                    embedding_model=self.model_name
-                )
-                kb_entries.append(kb_entry)
+            # Plain row mappings skip ORM object construction and identity-map tracking
+            mappings = [
+                {
+                    'question': pair['question'],
+                    'answer': pair['answer'],
+                    'category': pair.get('category'),
+                    'source': pair.get('source', 'user_defined'),
+                    'source_url': pair.get('source_url'),
+                    'embedding_vector': embedding_to_bytes(embeddings[i]),
+                    'embedding_model': self.model_name,
+                    'embedding_normalized': True,
+                    'embedding_text_hash': qa_text_hash(pair['question'], pair['answer']),
+                    'is_active': True
+                }
+                for i, pair in enumerate(qa_pairs)
+            ]
             
-            # Batch insert
-            db.add_all(kb_entries)
-            db.commit()
+            # Batch insert in chunks
+            for start in range(0, len(mappings), EMBEDDING_INSERT_CHUNK_SIZE):
+                db.bulk_insert_mappings(KnowledgeBase, mappings[start:start + EMBEDDING_INSERT_CHUNK_SIZE])
+                db.commit()
             
-            logger.info(f"Stored {len(kb_entries)} QA pairs with embeddings")
-            return kb_entries
+            logger.info(f"Stored {len(mappings)} QA pairs with embeddings")
+            return len(mappings)
             
         except Exception as e:
             logger.error(f"Error batch storing embeddings: {e}")
             db.rollback()
             raise
     
-    def rebuild_embeddings(self, db: Session) -> int:
-        """Rebuild all embeddings in the database"""
+    def rebuild_embeddings(self, db: Session, force: bool = False) -> int:
+        """Rebuild embeddings in the database
+        
+        Entries whose text hash and model still match are skipped unless force
+        is set (e.g. after switching inference backends for the same model).
+        Returns the number of entries re-encoded.
+        """
         try:
-            # Get all active knowledge base entries
-            kb_entries = db.query(KnowledgeBase).filter(KnowledgeBase.is_active == True).all()
+            # Load only the columns needed to decide what to re-encode (not the stored vectors)
+            kb_entries = db.query(
+                KnowledgeBase.id,
+                KnowledgeBase.question,
+                KnowledgeBase.answer,
+                KnowledgeBase.embedding_model,
+                KnowledgeBase.embedding_normalized,
+                KnowledgeBase.embedding_text_hash,
+                KnowledgeBase.embedding_vector.isnot(None).label('has_vector')
+            ).filter(KnowledgeBase.is_active == True).all()
+            
+            text_hashes = {entry.id: qa_text_hash(entry.question, entry.answer) for entry in kb_entries}
+            if not force:
+                active_count = len(kb_entries)
+                kb_entries = [
+                    entry for entry in kb_entries
+                    if entry.embedding_text_hash != text_hashes[entry.id]
+                    or entry.embedding_model != self.model_name
+                    or not entry.embedding_normalized
+                    or not entry.has_vector
+                ]
+                logger.info(f"{len(kb_entries)} of {active_count} active entries need re-encoding")
             
             if not kb_entries:
                 logger.info("No knowledge base entries to rebuild")
                 return 0
             
-            # Prepare texts for batch embedding
-            texts = [f"Q: {entry.question}\nA: {entry.answer}" for entry in kb_entries]
-            
             # Generate embeddings in batch
-            embeddings = self.generate_embeddings_batch(texts)
-            
-            # Update entries
-            for i, entry in enumerate(kb_entries):
-                entry.embedding_vector = json.dumps(embeddings[i])
-                entry.embedding_model = self.model_name
-                entry.updated_at = datetime.utcnow()
+            embeddings = self.embed_qa_pairs(
+                [entry.question for entry in kb_entries],
+                [entry.answer for entry in kb_entries]
+            )
             
+            # Update entries with one executemany UPDATE keyed on primary key
+            db.execute(update(KnowledgeBase), [
+                {
+                    'id': entry.id,
+                    'embedding_vector': embedding_to_bytes(embeddings[i]),
+                    'embedding_model': self.model_name,
+                    'embedding_normalized': True,
+                    'embedding_text_hash': text_hashes[entry.id]
+                }
+                for i, entry in enumerate(kb_entries)
+            ])
             db.commit()
             logger.info(f"Rebuilt embeddings for {len(kb_entries)} entries")
             return len(kb_entries)
@@ -316,10 +630,15 @@ class EmbeddingsService:
 
 # Global instance
 _embeddings_service = None
+_embeddings_service_lock = threading.Lock()
 
 def get_embeddings_service() -> EmbeddingsService:
     """Get global embeddings service instance"""
     global _embeddings_service
     if _embeddings_service is None:
-        _embeddings_service = EmbeddingsService()
+        # The model load is slow; without the lock the startup warmup and a
+        # first request could each load it
+        with _embeddings_service_lock:
+            if _embeddings_service is None:
+                _embeddings_service = EmbeddingsService()
     return _embeddings_service
\ No newline at end of file
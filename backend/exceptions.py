@@ -7,7 +7,10 @@ and more descriptive error messages throughout the application.
 
 from typing import Optional, Dict, Any
 from fastapi import HTTPException
+import functools
+import inspect
 import logging
+import orjson
 
 logger = logging.getLogger(__name__)
 
@@ -195,4 +198,72 @@ class ExceptionHandler:
         if exc_type is not None:
             logger.error(f"Exception in {self.operation}: {exc_type.__name__}: {exc_val}")
             return False  # Re-raise the exception
-        return True
\ No newline at end of file
+        return True
+
+
+# Decorator for endpoints whose unexpected failures are reported as database errors
+def db_endpoint(failure_message: str):
+    """Re-raise anything other than AIDentistException/HTTPException as DatabaseException(f"{failure_message}: ...")"""
+    
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                try:
+                    return await func(*args, **kwargs)
+                except (AIDentistException, HTTPException):
+                    raise
+                except Exception as e:
+                    raise DatabaseException(f"{failure_message}: {str(e)}")
+            return async_wrapper
+        
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            try:
+                return func(*args, **kwargs)
+            except (AIDentistException, HTTPException):
+                raise
+            except Exception as e:
+                raise DatabaseException(f"{failure_message}: {str(e)}")
+        return wrapper
+    
+    return decorator
+
+
+# ASGI middleware for turning unhandled exceptions into JSON error responses
+class ExceptionMiddleware:
+    """Pure ASGI wrapper that maps exceptions raised by the app through handle_exception"""
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        response_started = False
+        
+        async def send_wrapper(message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception as e:
+            if response_started:
+                # Too late to replace the response; let the server handle it
+                raise
+            http_exc = handle_exception(e)
+            body = orjson.dumps(http_exc.detail)
+            await send({
+                "type": "http.response.start",
+                "status": http_exc.status_code,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                ],
+            })
+            await send({"type": "http.response.body", "body": body})
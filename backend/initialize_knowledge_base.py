@@ -71,34 +71,24 @@ def load_dental_corpus(db: Session):
     dental_corpus = corpus_loader.get_dental_corpus()
     logger.info(f"Found {len(dental_corpus)} dental corpus entries")
     
-    loaded_count = 0
+    # One query for the questions already loaded instead of one per corpus entry
+    existing_questions = {
+        question for (question,) in db.query(KnowledgeBase.question).filter(
+            KnowledgeBase.source == 'dental_corpus'
+        ).all()
+    }
+    
+    new_pairs = []
     for qa_pair in dental_corpus:
-        try:
-            # Check if this question already exists
-            existing = db.query(KnowledgeBase).filter(
-                KnowledgeBase.question == qa_pair['question'],
-                KnowledgeBase.source == 'dental_corpus'
-            ).first()
-            
-            if existing:
-                logger.debug(f"Skipping existing entry: '{qa_pair['question'][:30]}...'")
-                continue
-            
-            # Create new entry
-            kb_entry = qa_manager.create_qa_pair(
-                db=db,
-                question=qa_pair['question'],
-                answer=qa_pair['answer'],
-                category=qa_pair['category'],
-                source=qa_pair['source']
-            )
-            
-            if kb_entry:
-                loaded_count += 1
-                logger.info(f"Loaded: '{qa_pair['question'][:50]}...'")
-            
-        except Exception as e:
-            logger.error(f"Error loading QA pair: {e}")
+        if qa_pair['question'] in existing_questions:
+            logger.debug(f"Skipping existing entry: '{qa_pair['question'][:30]}...'")
+            continue
+        
+        existing_questions.add(qa_pair['question'])
+        new_pairs.append(qa_pair)
+    
+    # Embed and store all new entries in one batch
+    loaded_count = qa_manager.batch_create_qa_pairs(db, new_pairs) if new_pairs else 0
     
     logger.info(f"Successfully loaded {loaded_count} new dental corpus entries")
     return loaded_count
@@ -1,9 +1,12 @@
-from fastapi import FastAPI, HTTPException, Depends, Request
+from fastapi import FastAPI, HTTPException, Depends, Request, Response, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.security import HTTPBearer
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import bindparam, case, insert, select
 from sqlalchemy.orm import Session
 import os
+import asyncio
+import hashlib
+import orjson
 from dotenv import load_dotenv
 from datetime import datetime, timedelta
 from typing import List
@@ -17,15 +20,20 @@ from schemas import (
     ChatbotQACreate, ChatbotQAResponse,
     AppointmentBooking, AppointmentCancellation
 )
-from treatment_data import TREATMENT_TYPES, AVAILABLE_TIME_SLOTS
+from treatment_data import (
+    TREATMENT_TYPES, VALID_TREATMENT_TYPES, VALID_TREATMENT_TYPE_SET, TREATMENT_DURATIONS,
+    find_available_slots, time_to_minutes, parse_appointment_datetime
+)
 from exceptions import (
-    AIDentistException, handle_exception, ValidationException,
-    AppointmentException, DatabaseException, ExceptionHandler
+    ValidationException, ExceptionMiddleware, db_endpoint
 )
 
 load_dotenv()
 
-app = FastAPI(title="AI Dentist API", version="1.0.0")
+app = FastAPI(title="AI Dentist API", version="1.0.0", default_response_class=ORJSONResponse)
+
+# Added before CORS so error responses still get CORS headers
+app.add_middleware(ExceptionMiddleware)
 
 app.add_middleware(
     CORSMiddleware,
@@ -35,32 +43,27 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-security = HTTPBearer()
-
-# Global exception handler
-@app.exception_handler(AIDentistException)
-async def ai_dentist_exception_handler(request: Request, exc: AIDentistException):
-    """Handle custom AI Dentist exceptions"""
-    http_exc = handle_exception(exc)
-    return JSONResponse(
-        status_code=http_exc.status_code,
-        content=http_exc.detail
-    )
+# Treatment duration resolved by the database so slot lookups fetch (time, minutes) tuples
+APPOINTMENT_DURATION = case(
+    dict(TREATMENT_DURATIONS),
+    value=Appointment.treatment_type,
+    else_=30
+).label("duration")
 
-@app.exception_handler(Exception)
-async def general_exception_handler(request: Request, exc: Exception):
-    """Handle any unhandled exceptions"""
-    http_exc = handle_exception(exc)
-    return JSONResponse(
-        status_code=http_exc.status_code,
-        content=http_exc.detail
-    )
+# Start time and duration of the appointments that block slots on a given date; built once
+# with bound parameters so every request reuses the same compiled statement
+SLOT_CONFLICT_QUERY = select(Appointment.appointment_time, APPOINTMENT_DURATION).where(
+    Appointment.appointment_date == bindparam("appointment_date"),
+    Appointment.status.in_(bindparam("statuses", expanding=True))
+)
+SLOT_BLOCKING_STATUSES = ['confirmed', 'completed']  # Don't block cancelled appointments
 
 @app.on_event("startup")
 async def startup_event():
     """Initialize services on app startup"""
     from email_scheduler import get_email_scheduler
     from vector_search import get_vector_search_engine
+    from embeddings_service import get_embeddings_service
     from database import get_db
     
     # Initialize email scheduler
@@ -69,18 +72,38 @@ async def startup_event():
         scheduler.start()
         logging.info("Email scheduler started successfully")
     
-    # Initialize vector search index
-    try:
-        vector_search = get_vector_search_engine()
-        db = next(get_db())
-        success = vector_search.initialize_index(db)
-        if success:
-            logging.info("Vector search index initialized successfully on startup")
-        else:
-            logging.error("Failed to initialize vector search index on startup")
-        db.close()
-    except Exception as e:
-        logging.error(f"Error initializing vector search on startup: {e}")
+    def warm_search_services():
+        # Initialize vector search index
+        try:
+            vector_search = get_vector_search_engine()
+            db = next(get_db())
+            try:
+                success = vector_search.initialize_index(db)
+            finally:
+                db.close()
+            if success:
+                logging.info("Vector search index initialized successfully on startup")
+            else:
+                logging.error("Failed to initialize vector search index on startup")
+        except Exception as e:
+            logging.error(f"Error initializing vector search on startup: {e}")
+        
+        # Load and warm the embeddings model before the first chat request
+        try:
+            get_embeddings_service().warmup()
+        except Exception as e:
+            logging.error(f"Error warming up embeddings model on startup: {e}")
+    
+    # Build the index and load the model in a worker thread so the app starts serving
+    # immediately; searches before it finishes fall back to auto-initialization
+    app.state.warmup_task = asyncio.create_task(asyncio.to_thread(warm_search_services))
+
+@app.on_event("shutdown")
+def shutdown_event():
+    """Stop the email scheduler and flush buffered email logs"""
+    from email_scheduler import get_email_scheduler
+    
+    get_email_scheduler().stop()
 
 @app.get("/")
 async def root():
@@ -90,216 +113,180 @@ async def root():
 async def health_check():
     return {"status": "healthy"}
 
+# Handlers that use the synchronous Session are plain `def` so FastAPI runs
+# them in its threadpool instead of blocking the event loop on DB round trips
 @app.post("/appointments", response_model=AppointmentResponse)
-async def create_appointment(
+@db_endpoint("Failed to create appointment")
+def create_appointment(
     appointment: AppointmentCreate,
     db: Session = Depends(get_db)
 ):
-    with ExceptionHandler("create_appointment"):
-        try:
-            # Validate treatment type
-            if appointment.treatment_type not in TREATMENT_TYPES:
-                raise ValidationException(
-                    f"Invalid treatment type: {appointment.treatment_type}",
-                    details={"valid_types": list(TREATMENT_TYPES.keys())}
-                )
-            
-            db_appointment = Appointment(
-                patient_name=appointment.patient_name,
-                patient_email=appointment.patient_email,
-                patient_phone=appointment.patient_phone,
-                appointment_date=appointment.appointment_date,
-                appointment_time=appointment.appointment_time,
-                treatment_type=appointment.treatment_type,
-                notes=appointment.notes
-            )
-            db.add(db_appointment)
-            db.commit()
-            db.refresh(db_appointment)
-            return db_appointment
-            
-        except Exception as e:
-            if not isinstance(e, AIDentistException):
-                raise DatabaseException(f"Failed to create appointment: {str(e)}")
-            raise
+    # Validate treatment type
+    if appointment.treatment_type not in VALID_TREATMENT_TYPE_SET:
+        raise ValidationException(
+            f"Invalid treatment type: {appointment.treatment_type}",
+            details={"valid_types": VALID_TREATMENT_TYPES}
+        )
+    
+    # INSERT ... RETURNING fetches the new row (including created_at) in one round trip
+    db_appointment = db.execute(
+        insert(Appointment).values(
+            patient_name=appointment.patient_name,
+            patient_email=appointment.patient_email,
+            patient_phone=appointment.patient_phone,
+            appointment_date=appointment.appointment_date,
+            appointment_time=appointment.appointment_time,
+            appointment_datetime=parse_appointment_datetime(
+                appointment.appointment_date, appointment.appointment_time
+            ),
+            treatment_type=appointment.treatment_type,
+            notes=appointment.notes
+        ).returning(Appointment)
+    ).scalar_one()
+    
+    # Serialize before commit expires the instance's attributes
+    response = AppointmentResponse.model_validate(db_appointment)
+    db.commit()
+    return response
 
 @app.get("/appointments")
-async def get_appointments(db: Session = Depends(get_db)):
-    with ExceptionHandler("get_appointments"):
-        try:
-            appointments = db.query(Appointment).all()
-            return appointments
-        except Exception as e:
-            raise DatabaseException(f"Failed to retrieve appointments: {str(e)}")
+@db_endpoint("Failed to retrieve appointments")
+def get_appointments(db: Session = Depends(get_db)):
+    appointments = db.query(Appointment).all()
+    return appointments
 
 @app.post("/treatments", response_model=TreatmentResponse)
-async def create_treatment(
+def create_treatment(
     treatment: TreatmentCreate,
     db: Session = Depends(get_db)
 ):
-    db_treatment = Treatment(
-        name=treatment.name,
-        description=treatment.description,
-        duration=treatment.duration,
-        price=treatment.price
-    )
-    db.add(db_treatment)
+    db_treatment = db.execute(
+        insert(Treatment).values(
+            name=treatment.name,
+            description=treatment.description,
+            duration=treatment.duration,
+            price=treatment.price
+        ).returning(Treatment)
+    ).scalar_one()
+    
+    # Serialize before commit expires the instance's attributes
+    response = TreatmentResponse.model_validate(db_treatment)
     db.commit()
-    db.refresh(db_treatment)
-    return db_treatment
+    return response
+
+def cached_json_response(request: Request, body: bytes, max_age: int, etag: str = None) -> Response:
+    """JSON response with an ETag, or a bodiless 304 when the client already has it"""
+    if etag is None:
+        etag = f'"{hashlib.md5(body).hexdigest()}"'
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={max_age}"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+# Columns serialized by GET /treatments
+TREATMENT_COLUMNS = (
+    Treatment.id,
+    Treatment.name,
+    Treatment.description,
+    Treatment.duration,
+    Treatment.price,
+    Treatment.is_active,
+    Treatment.created_at,
+)
 
 @app.get("/treatments")
-async def get_treatments(db: Session = Depends(get_db)):
-    treatments = db.query(Treatment).all()
-    return treatments
+def get_treatments(request: Request, db: Session = Depends(get_db)):
+    treatments = db.query(*TREATMENT_COLUMNS).all()
+    body = orjson.dumps([row._asdict() for row in treatments])
+    return cached_json_response(request, body, max_age=300)
 
+# TREATMENT_TYPES never changes at runtime, so serialize it once
+TREATMENT_TYPES_JSON = orjson.dumps(TREATMENT_TYPES)
+TREATMENT_TYPES_ETAG = f'"{hashlib.md5(TREATMENT_TYPES_JSON).hexdigest()}"'
 
 @app.get("/treatments/types")
-async def get_treatment_types():
-    return TREATMENT_TYPES
+async def get_treatment_types(request: Request):
+    return cached_json_response(request, TREATMENT_TYPES_JSON, max_age=3600, etag=TREATMENT_TYPES_ETAG)
 
 @app.get("/appointments/available-slots")
-async def get_available_slots(date: str, treatment: str, db: Session = Depends(get_db)):
+@db_endpoint("Failed to get available slots")
+def get_available_slots(date: str, treatment: str, db: Session = Depends(get_db)):
     """Get available time slots for a specific date and treatment type"""
-    with ExceptionHandler("get_available_slots"):
-        try:
-            # Validate treatment type
-            if treatment not in TREATMENT_TYPES:
-                raise ValidationException(
-                    f"Invalid treatment type: {treatment}",
-                    details={"valid_types": list(TREATMENT_TYPES.keys())}
-                )
-            
-            # Parse date to validate format
-            try:
-                target_date = datetime.strptime(date, "%Y-%m-%d")
-            except ValueError:
-                raise ValidationException("Invalid date format. Use YYYY-MM-DD")
-            
-            # Get treatment duration
-            treatment_duration = TREATMENT_TYPES[treatment]['duration']
-            
-            # Get existing appointments for the date
-            existing_appointments = db.query(Appointment).filter(
-                Appointment.appointment_date == date,
-                Appointment.status.in_(['confirmed', 'completed'])  # Don't block cancelled appointments
-            ).all()
-            
-            # Create set of blocked time slots
-            blocked_slots = set()
-            
-            for appointment in existing_appointments:
-                try:
-                    # Parse appointment time
-                    appointment_time = datetime.strptime(appointment.appointment_time, "%H:%M")
-                    
-                    # Get appointment duration
-                    appt_treatment_duration = TREATMENT_TYPES.get(appointment.treatment_type, {}).get('duration', 30)
-                    
-                    # Block all 30-minute slots that overlap with this appointment
-                    current_time = appointment_time
-                    end_time = appointment_time + timedelta(minutes=appt_treatment_duration)
-                    
-                    while current_time < end_time:
-                        blocked_slots.add(current_time.strftime('%H:%M'))
-                        current_time += timedelta(minutes=30)
-                        
-                except ValueError:
-                    # Skip invalid time formats
-                    continue
-            
-            # Filter available slots based on treatment duration and blocked slots
-            available_slots = []
-            
-            for slot in AVAILABLE_TIME_SLOTS:
-                try:
-                    slot_time = datetime.strptime(slot, '%H:%M')
-                    end_slot_time = slot_time + timedelta(minutes=treatment_duration)
-                    
-                    # Check if the entire appointment duration is available
-                    is_available = True
-                    check_time = slot_time
-                    
-                    while check_time < end_slot_time:
-                        if check_time.strftime('%H:%M') in blocked_slots:
-                            is_available = False
-                            break
-                        check_time += timedelta(minutes=30)
-                    
-                    # Also check if we have enough time slots available
-                    # (e.g., don't book a 90-minute appointment at 17:00 if we close at 18:00)
-                    last_slot_needed = (slot_time + timedelta(minutes=treatment_duration - 30)).strftime('%H:%M')
-                    if last_slot_needed not in AVAILABLE_TIME_SLOTS:
-                        is_available = False
-                    
-                    if is_available:
-                        available_slots.append(slot)
-                        
-                except ValueError:
-                    # Skip invalid slot formats
-                    continue
-            
-            return {"available_slots": available_slots}
-            
-        except ValidationException:
-            raise
-        except Exception as e:
-            logging.error(f"Error getting available slots: {e}")
-            # Return default slots if service fails gracefully
-            return {"available_slots": AVAILABLE_TIME_SLOTS}
+    # Validate treatment type
+    if treatment not in VALID_TREATMENT_TYPE_SET:
+        raise ValidationException(
+            f"Invalid treatment type: {treatment}",
+            details={"valid_types": VALID_TREATMENT_TYPES}
+        )
+    
+    # Parse date to validate format
+    try:
+        target_date = datetime.strptime(date, "%Y-%m-%d").date()
+    except ValueError:
+        raise ValidationException("Invalid date format. Use YYYY-MM-DD")
+    
+    # Get treatment duration
+    treatment_duration = TREATMENT_DURATIONS[treatment]
+    
+    # Get start time and duration of existing appointments for the date
+    existing_appointments = db.execute(
+        SLOT_CONFLICT_QUERY,
+        {"appointment_date": target_date, "statuses": SLOT_BLOCKING_STATUSES}
+    ).all()
+    
+    available_slots = find_available_slots(treatment_duration, existing_appointments)
+    
+    return {"available_slots": available_slots}
 
 @app.post("/appointments/book")
-async def book_appointment(booking: AppointmentBooking, db: Session = Depends(get_db)):
+def book_appointment(booking: AppointmentBooking, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
     try:
         # Validate treatment type
-        if booking.treatment not in TREATMENT_TYPES:
+        if booking.treatment not in VALID_TREATMENT_TYPE_SET:
             raise HTTPException(status_code=400, detail="Invalid treatment type")
         
         treatment_info = TREATMENT_TYPES[booking.treatment]
         
         # Parse date and time
         appointment_date = datetime.strptime(booking.date, "%Y-%m-%d")
-        appointment_time = datetime.strptime(booking.time, "%H:%M")
+        start_minutes = time_to_minutes(booking.time)
+        if start_minutes is None:
+            raise ValueError(f"time data {booking.time!r} does not match format '%H:%M'")
         
         # Combine date and time
-        start_datetime = appointment_date.replace(
-            hour=appointment_time.hour,
-            minute=appointment_time.minute,
-            second=0,
-            microsecond=0
-        )
+        start_datetime = appointment_date + timedelta(minutes=start_minutes)
         end_datetime = start_datetime + timedelta(minutes=treatment_info["duration"])
         
-        # Save to database
-        db_appointment = Appointment(
-            patient_name=booking.name,
-            patient_email=booking.email,
-            patient_phone=booking.phone,
-            appointment_date=booking.date,
-            appointment_time=booking.time,
-            treatment_type=booking.treatment,
-            notes=booking.notes,
-            status="confirmed"
-        )
-        
-        db.add(db_appointment)
+        # Save to database, getting the new id back from the INSERT itself
+        appointment_id = db.execute(
+            insert(Appointment).values(
+                patient_name=booking.name,
+                patient_email=booking.email,
+                patient_phone=booking.phone,
+                appointment_date=appointment_date.date(),
+                appointment_time=booking.time,
+                appointment_datetime=start_datetime,
+                treatment_type=booking.treatment,
+                notes=booking.notes,
+                status="confirmed"
+            ).returning(Appointment.id)
+        ).scalar_one()
         db.commit()
-        db.refresh(db_appointment)
         
-        # Schedule automated emails
+        # Schedule automated emails after the response is sent
         from email_scheduler import get_email_scheduler
         email_scheduler = get_email_scheduler()
-        email_results = email_scheduler.schedule_appointment_emails(db_appointment.id)
+        background_tasks.add_task(email_scheduler.schedule_appointment_emails, appointment_id)
         
         return {
             "message": "Appointment booked successfully!",
-            "appointment_id": db_appointment.id,
+            "appointment_id": appointment_id,
             "treatment": treatment_info['name'],
             "date": booking.date,
             "time": booking.time,
             "price": treatment_info['price'],
             "duration": treatment_info['duration'],
-            "emails_scheduled": email_results
+            "emails_scheduled": "queued"
         }
         
     except ValueError as e:
@@ -313,92 +300,89 @@ async def chat_with_ai(message: dict):
     # TODO: Implement OpenAI integration
     return {"response": "AI response coming soon!"}
 
+# Columns returned by /appointments/find, selected directly instead of hydrating Appointment rows
+FIND_APPOINTMENT_COLUMNS = (
+    Appointment.id,
+    Appointment.patient_name,
+    Appointment.patient_email,
+    Appointment.patient_phone,
+    Appointment.appointment_date,
+    Appointment.appointment_time,
+    Appointment.treatment_type,
+    Appointment.notes,
+    Appointment.status,
+    Appointment.created_at,
+)
+
 @app.get("/appointments/find")
-async def find_appointments_by_email(
+@db_endpoint("Failed to find appointments")
+def find_appointments_by_email(
     email: str,
     name: str = None,
     db: Session = Depends(get_db)
 ):
     """Find upcoming appointments by email and optionally name"""
-    with ExceptionHandler("find_appointments"):
-        try:
-            from datetime import datetime, date
-            today = date.today().strftime("%Y-%m-%d")
-            
-            query = db.query(Appointment).filter(
-                Appointment.patient_email == email,
-                Appointment.appointment_date >= today,
-                Appointment.status.in_(['confirmed', 'completed'])  # Not cancelled
-            )
-            
-            if name:
-                query = query.filter(Appointment.patient_name.ilike(f"%{name}%"))
-            
-            appointments = query.order_by(Appointment.appointment_date, Appointment.appointment_time).all()
-            
-            return [{
-                "id": apt.id,
-                "patient_name": apt.patient_name,
-                "patient_email": apt.patient_email,
-                "patient_phone": apt.patient_phone,
-                "appointment_date": apt.appointment_date,
-                "appointment_time": apt.appointment_time,
-                "treatment_type": apt.treatment_type,
-                "notes": apt.notes,
-                "status": apt.status,
-                "created_at": apt.created_at.isoformat() if apt.created_at else None
-            } for apt in appointments]
-            
-        except Exception as e:
-            raise DatabaseException(f"Failed to find appointments: {str(e)}")
+    from datetime import date
+    today = date.today()
+    
+    query = db.query(*FIND_APPOINTMENT_COLUMNS).filter(
+        Appointment.patient_email == email,
+        Appointment.appointment_date >= today,
+        Appointment.status.in_(['confirmed', 'completed'])  # Not cancelled
+    )
+    
+    if name:
+        query = query.filter(Appointment.patient_name.ilike(f"%{name}%"))
+    
+    appointments = query.order_by(Appointment.appointment_date, Appointment.appointment_time).all()
+    
+    # orjson encodes created_at natively, so skip FastAPI's jsonable_encoder pass
+    return ORJSONResponse([row._asdict() for row in appointments])
 
 @app.post("/appointments/{appointment_id}/cancel")
-async def cancel_appointment(
+@db_endpoint("Failed to cancel appointment")
+def cancel_appointment(
     appointment_id: int,
     cancellation_data: AppointmentCancellation,
     db: Session = Depends(get_db)
 ):
     """Cancel an appointment with reason"""
-    with ExceptionHandler("cancel_appointment"):
-        try:
-            from datetime import datetime
-            from email_scheduler import get_email_scheduler
-            
-            appointment = db.query(Appointment).filter(Appointment.id == appointment_id).first()
-            
-            if not appointment:
-                raise ValidationException("Appointment not found")
-            
-            if appointment.status == "cancelled":
-                raise ValidationException("Appointment is already cancelled")
-            
-            # Update appointment status
-            appointment.status = "cancelled"
-            appointment.cancellation_reason = cancellation_data.cancellation_reason
-            appointment.cancelled_at = datetime.utcnow()
-            appointment.updated_at = datetime.utcnow()
-            
-            db.commit()
-            db.refresh(appointment)
-            
-            # Cancel scheduled emails
-            email_scheduler = get_email_scheduler()
-            email_cancelled = email_scheduler.cancel_appointment_emails(appointment_id)
-            
-            return {
-                "message": "Appointment cancelled successfully",
-                "appointment_id": appointment_id,
-                "status": "cancelled",
-                "cancellation_reason": cancellation_data.cancellation_reason,
-                "cancelled_at": appointment.cancelled_at.isoformat(),
-                "emails_cancelled": email_cancelled
-            }
-            
-        except ValidationException:
-            raise
-        except Exception as e:
-            db.rollback()
-            raise DatabaseException(f"Failed to cancel appointment: {str(e)}")
+    from datetime import datetime
+    
+    appointment = db.query(Appointment).filter(Appointment.id == appointment_id).first()
+    
+    if not appointment:
+        raise ValidationException("Appointment not found")
+    
+    if appointment.status == "cancelled":
+        raise ValidationException("Appointment is already cancelled")
+    
+    # Update appointment status
+    appointment.status = "cancelled"
+    appointment.cancellation_reason = cancellation_data.cancellation_reason
+    cancelled_at = datetime.utcnow()
+    appointment.cancelled_at = cancelled_at
+    appointment.updated_at = cancelled_at
+    
+    # Unschedule the reminder and follow-up in the same commit, so the
+    # due-email sweep can never pick them up for a cancelled appointment
+    emails_cancelled = (
+        (appointment.reminder_due_at is not None and not appointment.reminder_sent)
+        or (appointment.followup_due_at is not None and not appointment.followup_sent)
+    )
+    appointment.reminder_due_at = None
+    appointment.followup_due_at = None
+    
+    db.commit()
+    
+    return {
+        "message": "Appointment cancelled successfully",
+        "appointment_id": appointment_id,
+        "status": "cancelled",
+        "cancellation_reason": cancellation_data.cancellation_reason,
+        "cancelled_at": cancelled_at.isoformat(),
+        "emails_cancelled": emails_cancelled
+    }
 
 # Include additional admin endpoints
 from additional_endpoints import router as admin_router
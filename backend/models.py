@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, Float, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, Date, DateTime, Text, Float, Boolean, ForeignKey, Index, LargeBinary
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from database import Base
@@ -31,16 +31,34 @@ class Appointment(Base):
     patient_name = Column(String, index=True)
     patient_email = Column(String, index=True)
     patient_phone = Column(String)
-    appointment_date = Column(String)  # Store as string for now, can be converted to Date later
-    appointment_time = Column(String)
+    appointment_date = Column(Date)
+    appointment_time = Column(String)  # "HH:MM", matching the AVAILABLE_TIME_SLOTS keys
+    appointment_datetime = Column(DateTime, index=True)  # Parsed appointment_date + appointment_time
     treatment_type = Column(String)
     notes = Column(Text)
-    admin_notes = Column(Text)  # Admin notes for internal use
+    admin_notes = Column(Text, nullable=True, default=None)  # Admin notes for internal use
     status = Column(String, default="confirmed")  # confirmed, completed, cancelled
     cancellation_reason = Column(Text)  # Patient's reason for cancellation
     cancelled_at = Column(DateTime(timezone=True))  # When the appointment was cancelled
+    reminder_due_at = Column(DateTime(timezone=True))  # When the reminder email should go out (NULL = not scheduled)
+    followup_due_at = Column(DateTime(timezone=True))  # When the follow-up email should go out (NULL = not scheduled)
+    reminder_sent = Column(Boolean, default=False, nullable=False)
+    followup_sent = Column(Boolean, default=False, nullable=False)
+    email_context_json = Column(Text)  # AppointmentContext captured when the emails were scheduled
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    
+    # lazy='raise' turns an accidental per-row lazy load into an error; use selectinload() where needed
+    email_logs = relationship('EmailLog', back_populates='appointment', lazy='raise', passive_deletes=True)
+    
+    __table_args__ = (
+        # Used by the email scheduler's due-email sweep
+        Index('ix_appointments_reminder_due', reminder_due_at, reminder_sent),
+        Index('ix_appointments_followup_due', followup_due_at, followup_sent),
+        # Used by the available-slots lookup and the patient appointment search
+        Index('ix_appt_date_status', appointment_date, status),
+        Index('ix_appt_email_date', patient_email, appointment_date),
+    )
 
 class ChatbotQA(Base):
     __tablename__ = "chatbot_qa"
@@ -71,6 +89,40 @@ class EmailLog(Base):
     opened_at = Column(DateTime(timezone=True))
     clicked_at = Column(DateTime(timezone=True))
     
+    appointment = relationship('Appointment', back_populates='email_logs', lazy='raise')
+    
+    __table_args__ = (
+        # Partial index matching the /stats filter so the grouped count is an index-only scan
+        Index(
+            'ix_email_logs_stats', sent_at.desc(), email_type, status,
+            postgresql_where=status.in_(('sent', 'failed'))
+        ),
+        Index('ix_email_logs_filter', email_type, status, appointment_id, sent_at.desc()),
+    )
+    
+class ScheduledEmailContent(Base):
+    """Email content generated ahead of time for an appointment's scheduled emails"""
+    __tablename__ = "scheduled_email_content"
+    
+    appointment_id = Column(Integer, ForeignKey('appointments.id', ondelete='CASCADE'), primary_key=True)
+    email_type = Column(String, primary_key=True)  # 'reminder' or 'followup'
+    subject = Column(String, nullable=False)
+    html_content = Column(Text, nullable=False)
+    plain_text_content = Column(Text, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class TestEmailTask(Base):
+    """Outcome of a queued /send-test email, polled by the admin UI"""
+    __tablename__ = "test_email_tasks"
+    
+    task_id = Column(String, primary_key=True)
+    email_type = Column(String, nullable=False)  # 'reminder' or 'followup'
+    status = Column(String, nullable=False)  # 'pending', 'sent' or 'failed'
+    subject = Column(String)
+    message_id = Column(String)
+    error_message = Column(Text)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+
 class EmailTemplate(Base):
     """Email template table for storing reusable templates"""
     __tablename__ = "email_templates"
@@ -109,8 +161,10 @@ class KnowledgeBase(Base):
     category = Column(String, index=True)
     source = Column(String)  # 'user_defined', 'dental_corpus', 'external'
     source_url = Column(String)  # Reference URL if applicable
-    embedding_vector = Column(Text)  # JSON serialized embedding vector
+    embedding_vector = Column(LargeBinary)  # Raw float32 embedding vector
     embedding_model = Column(String, default='basic-text-similarity')
+    embedding_normalized = Column(Boolean, default=True)  # Stored vector is unit length
+    embedding_text_hash = Column(String(40))  # SHA-1 of the text the embedding was generated from
     confidence_threshold = Column(Float, default=0.7)
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -181,6 +181,17 @@ class QAManager:
             logger.error(f"Error searching QA pairs: {e}")
             return []
     
+    def get_questions(self, db: Session) -> List[str]:
+        """Get the question text of every active QA pair"""
+        try:
+            result = db.query(KnowledgeBase.question).filter(KnowledgeBase.is_active == True).all()
+            
+            return [r[0] for r in result]
+            
+        except Exception as e:
+            logger.error(f"Error getting questions: {e}")
+            return []
+    
     def get_categories(self, db: Session) -> List[str]:
         """Get all available categories"""
         try:
@@ -207,11 +218,11 @@ class QAManager:
             logger.error(f"Error getting sources: {e}")
             return []
     
-    def batch_create_qa_pairs(self, db: Session, qa_pairs: List[Dict]) -> List[KnowledgeBase]:
-        """Create multiple QA pairs in batch"""
+    def batch_create_qa_pairs(self, db: Session, qa_pairs: List[Dict]) -> int:
+        """Create multiple QA pairs in batch, returning the number created"""
         try:
             # Use embeddings service batch functionality
-            kb_entries = self.embeddings_service.batch_store_embeddings(db, qa_pairs)
+            created_count = self.embeddings_service.batch_store_embeddings(db, qa_pairs)
             
             # Rebuild vector index to include new entries
             self.vector_search.rebuild_index(db)
@@ -229,13 +240,13 @@ class QAManager:
             db.add_all(chatbot_qa_entries)
             db.commit()
             
-            logger.info(f"Batch created {len(kb_entries)} QA pairs")
-            return kb_entries
+            logger.info(f"Batch created {created_count} QA pairs")
+            return created_count
             
         except Exception as e:
             logger.error(f"Error batch creating QA pairs: {e}")
             db.rollback()
-            return []
+            return 0
     
     def duplicate_qa_pair(self, db: Session, kb_id: int, new_question: str = None) -> Optional[KnowledgeBase]:
         """Duplicate an existing QA pair"""
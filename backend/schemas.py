@@ -1,12 +1,12 @@
 from pydantic import BaseModel
 from typing import Optional
-from datetime import datetime
+from datetime import date, datetime
 
 class AppointmentCreate(BaseModel):
     patient_name: str
     patient_email: str
     patient_phone: str
-    appointment_date: str
+    appointment_date: date
     appointment_time: str
     treatment_type: str
     notes: Optional[str] = None
@@ -16,7 +16,7 @@ class AppointmentResponse(BaseModel):
     patient_name: str
     patient_email: str
     patient_phone: str
-    appointment_date: str
+    appointment_date: date
     appointment_time: str
     treatment_type: str
     notes: Optional[str] = None
@@ -85,4 +85,36 @@ class AppointmentBooking(BaseModel):
     notes: Optional[str] = None
 
 class AppointmentCancellation(BaseModel):
-    cancellation_reason: str
\ No newline at end of file
+    cancellation_reason: str
+
+class EmailLogResponse(BaseModel):
+    id: int
+    appointment_id: int
+    email_type: str
+    subject: str
+    to_email: str
+    to_name: Optional[str] = None
+    status: str
+    error_message: Optional[str] = None
+    message_id: Optional[str] = None
+    sent_at: Optional[datetime] = None
+    delivered_at: Optional[datetime] = None
+    opened_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
+class EmailTemplateSummary(BaseModel):
+    id: int
+    name: str
+    template_type: str
+    subject_template: str
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
+class EmailTemplateResponse(EmailTemplateSummary):
+    html_template: str
+    plain_text_template: str
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Compare find_available_slots (the 30-minute bitmask grid behind
+GET /appointments/available-slots) with the original string-stepping algorithm.
+
+Runs standalone (python test_available_slots.py) or under pytest.
+"""
+
+import sys
+import os
+from datetime import datetime, timedelta
+from itertools import combinations
+
+# Add the current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from treatment_data import AVAILABLE_TIME_SLOTS, TREATMENT_DURATIONS, find_available_slots
+
+DURATIONS = sorted(set(TREATMENT_DURATIONS.values()))
+
+# Durations that are whole multiples of the 30-minute grid behave exactly as before
+GRID_DURATIONS = [duration for duration in DURATIONS if duration % 30 == 0]
+
+# (start time, duration) of booked appointments for each scenario
+SCENARIOS = {
+    "empty day": [],
+    "overlapping": [("10:00", 90), ("10:30", 60)],
+    "overlapping across morning": [("09:00", 120), ("09:30", 45), ("11:00", 60)],
+    "lunch-adjacent morning": [("11:30", 30)],
+    "lunch-adjacent spill": [("11:00", 90)],
+    "lunch-adjacent afternoon": [("14:00", 60)],
+    "end of day": [("17:00", 30)],
+    "end of day long": [("16:00", 120)],
+    "end of day 45": [("16:30", 45)],
+    "fully booked": [(slot, 30) for slot in AVAILABLE_TIME_SLOTS],
+    "invalid time skipped": [("25:99", 60), ("noon", 30), ("15:00", 30)],
+}
+
+def baseline_available_slots(duration, booked):
+    """The original get_available_slots algorithm, over (start time, duration) pairs"""
+    blocked_slots = set()
+    
+    for time_str, appt_duration in booked:
+        try:
+            appointment_time = datetime.strptime(time_str, "%H:%M")
+        except ValueError:
+            continue
+        
+        current_time = appointment_time
+        end_time = appointment_time + timedelta(minutes=appt_duration)
+        while current_time < end_time:
+            blocked_slots.add(current_time.strftime('%H:%M'))
+            current_time += timedelta(minutes=30)
+    
+    available_slots = []
+    
+    for slot in AVAILABLE_TIME_SLOTS:
+        slot_time = datetime.strptime(slot, '%H:%M')
+        end_slot_time = slot_time + timedelta(minutes=duration)
+        
+        is_available = True
+        check_time = slot_time
+        while check_time < end_slot_time:
+            if check_time.strftime('%H:%M') in blocked_slots:
+                is_available = False
+                break
+            check_time += timedelta(minutes=30)
+        
+        last_slot_needed = (slot_time + timedelta(minutes=duration - 30)).strftime('%H:%M')
+        if last_slot_needed not in AVAILABLE_TIME_SLOTS:
+            is_available = False
+        
+        if is_available:
+            available_slots.append(slot)
+    
+    return available_slots
+
+def test_scenarios_match_baseline():
+    """Named scenarios give the same slots as before for every grid-aligned duration"""
+    print("=== Testing Named Scenarios ===")
+    
+    for name, booked in SCENARIOS.items():
+        for duration in GRID_DURATIONS:
+            expected = baseline_available_slots(duration, booked)
+            actual = find_available_slots(duration, booked)
+            assert actual == expected, f"{name}, {duration} min: expected {expected}, got {actual}"
+        print(f"✅ {name}")
+
+def test_exhaustive_pairs_match_baseline():
+    """Every one- and two-appointment day on the slot grid gives the same slots as before"""
+    print("\n=== Testing All One- and Two-Appointment Days ===")
+    
+    bookings = [(slot, duration) for slot in AVAILABLE_TIME_SLOTS for duration in DURATIONS]
+    days = [[booking] for booking in bookings] + [list(pair) for pair in combinations(bookings, 2)]
+    
+    for booked in days:
+        for duration in GRID_DURATIONS:
+            expected = baseline_available_slots(duration, booked)
+            actual = find_available_slots(duration, booked)
+            assert actual == expected, f"{booked}, {duration} min: expected {expected}, got {actual}"
+    
+    print(f"✅ {len(days)} days x {len(GRID_DURATIONS)} durations match")
+
+def test_45_minute_treatments_are_bookable():
+    """45-minute treatments occupy two periods (the baseline never offered them)"""
+    print("\n=== Testing 45-Minute Treatments ===")
+    
+    for name, booked in SCENARIOS.items():
+        assert baseline_available_slots(45, booked) == [], f"{name}: baseline offered a 45-minute slot"
+        assert find_available_slots(45, booked) == find_available_slots(60, booked), name
+    
+    print("✅ 45-minute treatments get the same slots as 60-minute ones")
+
+def test_off_grid_appointments_block_overlapping_slots():
+    """Appointments starting between slots block every period they overlap"""
+    print("\n=== Testing Off-Grid Appointment Times ===")
+    
+    # 10:15-11:15 overlaps the 10:00, 10:30 and 11:00 periods
+    available = find_available_slots(30, [("10:15", 60)])
+    assert "10:00" not in available and "10:30" not in available and "11:00" not in available
+    assert "09:30" in available and "11:30" in available
+    
+    print("✅ Off-grid appointments block overlapping slots")
+
+if __name__ == "__main__":
+    try:
+        test_scenarios_match_baseline()
+        test_exhaustive_pairs_match_baseline()
+        test_45_minute_treatments_are_bookable()
+        test_off_grid_appointments_block_overlapping_slots()
+    except AssertionError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    
+    print("\n✅ All slot availability checks passed")
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Test the email scheduler's due-time bookkeeping and its periodic due-email sweep.
+
+Runs against a throwaway SQLite database with a recording email service in
+place of SendGrid, standalone or under pytest.
+"""
+
+import sys
+import os
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+# Add the current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# Point the app at a throwaway SQLite database before any app module is imported
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'test_ai_dentist.db')}"
+
+from database import Base, SessionLocal, engine
+from models import Appointment, EmailLog, ScheduledEmailContent
+from email_scheduler import EmailScheduler
+
+class RecordingEmailService:
+    """Stands in for EmailServiceManager, recording messages instead of sending them"""
+    
+    def __init__(self):
+        self.sent = []
+    
+    async def send_emails_async(self, messages):
+        self.sent.extend(messages)
+        return [{"success": True, "message_id": f"test-{len(self.sent)}-{i}"} for i in range(len(messages))]
+
+def make_scheduler():
+    """An EmailScheduler whose sends are recorded (its APScheduler is never started)"""
+    scheduler = EmailScheduler()
+    scheduler.email_service = RecordingEmailService()
+    return scheduler
+
+def booking_at(start):
+    """A transient appointment starting at the given UTC datetime"""
+    return Appointment(
+        patient_name="Sweep Test",
+        patient_email="sweep@example.com",
+        appointment_date=start.date(),
+        appointment_time=start.strftime("%H:%M"),
+        treatment_type="cleaning",
+        status="confirmed"
+    )
+
+def test_due_times_skip_past_sends():
+    """Reminders and follow-ups are only scheduled while their send time is ahead"""
+    print("=== Testing Email Due Times ===")
+    
+    scheduler = make_scheduler()
+    now = datetime.now(timezone.utc).replace(second=0, microsecond=0)
+    
+    future = booking_at(now + timedelta(days=3))
+    assert scheduler._set_email_due_times(future, now) == {"reminder": True, "followup": True}
+    assert future.reminder_due_at == now + timedelta(days=2)
+    assert future.followup_due_at == now + timedelta(days=3, hours=2)
+    print("✅ Booking three days out gets a reminder and a follow-up")
+    
+    soon = booking_at(now + timedelta(hours=1))
+    assert scheduler._set_email_due_times(soon, now) == {"reminder": False, "followup": True}
+    assert soon.reminder_due_at is None
+    print("✅ Booking within 24 hours gets only a follow-up")
+    
+    past = booking_at(now - timedelta(hours=3))
+    assert scheduler._set_email_due_times(past, now) == {"reminder": False, "followup": False}
+    assert past.reminder_due_at is None and past.followup_due_at is None
+    print("✅ Booking already more than 2 hours past gets no emails")
+
+def test_sweep_sends_each_due_email_once():
+    """The sweep sends what is due, claims it, and leaves everything else alone"""
+    print("\n=== Testing Due-Email Sweep ===")
+    
+    Base.metadata.create_all(bind=engine)
+    now = datetime.now(timezone.utc)
+    
+    def appointment(email, status, **due):
+        return Appointment(
+            patient_name=email.split("@")[0], patient_email=email,
+            appointment_date=now.date(), appointment_time="10:00",
+            treatment_type="cleaning", status=status, **due
+        )
+    
+    with SessionLocal() as db:
+        appointments = {
+            "due_reminder": appointment("due-reminder@example.com", "confirmed", reminder_due_at=now - timedelta(minutes=1)),
+            "future_reminder": appointment("future-reminder@example.com", "confirmed", reminder_due_at=now + timedelta(hours=1)),
+            "sent_reminder": appointment("sent-reminder@example.com", "confirmed", reminder_due_at=now - timedelta(hours=1), reminder_sent=True),
+            "cancelled_reminder": appointment("cancelled@example.com", "cancelled", reminder_due_at=now - timedelta(minutes=1)),
+            # Cancelled after the visit time; must not be auto-completed and sent a follow-up
+            "cancelled_followup": appointment(
+                "cancelled-followup@example.com", "cancelled",
+                appointment_datetime=(now - timedelta(hours=3)).replace(tzinfo=None),
+                followup_due_at=now - timedelta(hours=1)
+            ),
+            "due_followup": appointment("due-followup@example.com", "completed", followup_due_at=now - timedelta(minutes=1)),
+        }
+        db.add_all(appointments.values())
+        db.flush()
+        
+        # Stored content keeps the sweep off the AI generator
+        for key, email_type in (("due_reminder", "reminder"), ("due_followup", "followup")):
+            db.add(ScheduledEmailContent(
+                appointment_id=appointments[key].id, email_type=email_type,
+                subject=f"{email_type} subject", html_content="<p>Test</p>", plain_text_content="Test"
+            ))
+        db.commit()
+        ids = {key: appt.id for key, appt in appointments.items()}
+    
+    scheduler = make_scheduler()
+    scheduler._dispatch_due_emails()
+    
+    sent_to = sorted(message.to_email for message in scheduler.email_service.sent)
+    assert sent_to == ["due-followup@example.com", "due-reminder@example.com"], sent_to
+    print(f"✅ Sent exactly the due emails: {sent_to}")
+    
+    with SessionLocal() as db:
+        state = {key: db.get(Appointment, appointment_id) for key, appointment_id in ids.items()}
+        assert state["due_reminder"].reminder_sent
+        assert not state["future_reminder"].reminder_sent
+        assert state["cancelled_reminder"].reminder_sent  # Claimed, but skipped as inactive
+        assert state["due_followup"].followup_sent
+        assert state["cancelled_followup"].followup_sent  # Claimed, but skipped as cancelled
+        assert state["cancelled_followup"].status == "cancelled", "cancelled appointment was auto-completed"
+        
+        logged = db.query(EmailLog).filter(EmailLog.appointment_id.in_(ids.values())).count()
+        assert logged == 2, f"expected 2 email logs, got {logged}"
+    print("✅ Due emails claimed and logged")
+    
+    # A second sweep finds nothing left to send
+    scheduler._dispatch_due_emails()
+    assert len(scheduler.email_service.sent) == 2, "a due email was sent twice"
+    print("✅ Second sweep sends nothing")
+
+if __name__ == "__main__":
+    try:
+        test_due_times_skip_past_sends()
+        test_sweep_sends_each_due_email_once()
+    except AssertionError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    
+    print("\n✅ Due-email sweep checks passed")
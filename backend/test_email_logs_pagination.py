@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Test keyset pagination of GET /api/email/logs on the (sent_at, id) cursor,
+including logs that share a sent_at across a page boundary.
+
+Runs against a throwaway SQLite database, standalone or under pytest.
+"""
+
+import sys
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+# Add the current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# Point the app at a throwaway SQLite database before any app module is imported
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'test_ai_dentist.db')}"
+
+from fastapi import Response
+
+from database import Base, SessionLocal, engine
+from models import Appointment, EmailLog
+from email_endpoints import get_email_logs
+
+PAGE_SIZE = 4
+
+def create_logs(db):
+    """Insert an appointment with logs whose sent_at values tie in groups of three"""
+    appointment = Appointment(patient_name="Pagination Test", patient_email="pagination@example.com")
+    db.add(appointment)
+    db.flush()
+    
+    base_time = datetime(2024, 1, 15, 9, 0)
+    for i in range(15):
+        db.add(EmailLog(
+            appointment_id=appointment.id,
+            email_type="reminder" if i % 2 else "followup",
+            subject=f"Test email {i}",
+            to_email="pagination@example.com",
+            status="sent",
+            sent_at=base_time + timedelta(minutes=i // 3)
+        ))
+    db.commit()
+    
+    return appointment.id
+
+def fetch_all_pages(db, appointment_id, email_type=None):
+    """Follow the X-Next-Cursor headers until the last page, returning every log id seen"""
+    seen = []
+    before, before_id = None, None
+    
+    while True:
+        response = Response()
+        logs = get_email_logs(
+            response=response, appointment_id=appointment_id, email_type=email_type,
+            status=None, limit=PAGE_SIZE, before=before, before_id=before_id, db=db
+        )
+        seen.extend(log.id for log in logs)
+        
+        if "X-Next-Cursor" not in response.headers:
+            return seen
+        
+        before = datetime.fromisoformat(response.headers["X-Next-Cursor"])
+        before_id = int(response.headers["X-Next-Cursor-Id"])
+
+def test_keyset_pagination_returns_every_log_once():
+    """Paging through tied sent_at values neither skips nor repeats logs"""
+    print("=== Testing Email Log Keyset Pagination ===")
+    
+    Base.metadata.create_all(bind=engine)
+    
+    with SessionLocal() as db:
+        appointment_id = create_logs(db)
+        
+        expected = [
+            log.id for log in db.query(EmailLog)
+            .filter(EmailLog.appointment_id == appointment_id)
+            .order_by(EmailLog.sent_at.desc(), EmailLog.id.desc())
+        ]
+        
+        seen = fetch_all_pages(db, appointment_id)
+        assert seen == expected, f"expected {expected}, got {seen}"
+        print(f"✅ {len(seen)} logs over {-(-len(seen) // PAGE_SIZE)} pages, none skipped or repeated")
+        
+        # Filters apply on every page, not just the first
+        expected_reminders = [
+            log_id for log_id in expected
+            if db.get(EmailLog, log_id).email_type == "reminder"
+        ]
+        seen_reminders = fetch_all_pages(db, appointment_id, email_type="reminder")
+        assert seen_reminders == expected_reminders, f"expected {expected_reminders}, got {seen_reminders}"
+        print(f"✅ {len(seen_reminders)} filtered logs paginated correctly")
+
+if __name__ == "__main__":
+    try:
+        test_keyset_pagination_returns_every_log_once()
+    except AssertionError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    
+    print("\n✅ Email log pagination checks passed")
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Test that batched QA pair embeddings match embedding each question and answer
+on its own, whichever embeddings backend is available.
+
+Runs standalone or under pytest.
+"""
+
+import sys
+import os
+import numpy as np
+
+# Add the current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from embeddings_service import get_embeddings_service
+
+QA_PAIRS = [
+    ("What are your office hours?", "We are open Monday to Friday, 9:00 AM to 5:30 PM."),
+    ("Do you accept insurance?", "Yes, we accept most major dental insurance plans."),
+    ("How often should I get a cleaning?", "Most patients should have a professional cleaning every six months."),
+    ("Is teeth whitening safe?", "Professional whitening is safe when supervised by a dentist."),
+]
+
+def reference_embedding(service, question, answer):
+    """Normalized mean of the question and answer embeddings, computed one text at a time"""
+    combined = service.generate_embedding(question) + service.generate_embedding(answer)
+    return combined / np.linalg.norm(combined)
+
+def test_embed_qa_pairs_matches_individual_embeddings():
+    """Each batched row equals the per-pair reference and is unit length"""
+    print("=== Testing Batched QA Pair Embeddings ===")
+    
+    service = get_embeddings_service()
+    print(f"🔢 Model: {service.model_name} ({service.embedding_dimension} dimensions)")
+    
+    questions = [question for question, _ in QA_PAIRS]
+    answers = [answer for _, answer in QA_PAIRS]
+    embeddings = service.embed_qa_pairs(questions, answers)
+    
+    assert embeddings.shape == (len(QA_PAIRS), service.embedding_dimension), embeddings.shape
+    assert embeddings.dtype == np.float32, embeddings.dtype
+    
+    norms = np.linalg.norm(embeddings, axis=1)
+    assert np.allclose(norms, 1.0, atol=1e-5), f"rows are not unit length: {norms}"
+    print("✅ Rows are unit-length float32 vectors")
+    
+    for (question, answer), embedding in zip(QA_PAIRS, embeddings):
+        expected = reference_embedding(service, question, answer)
+        assert np.allclose(embedding, expected, atol=1e-4), f"batched embedding differs for '{question}'"
+        assert np.allclose(service.embed_qa_pair(question, answer), embedding, atol=1e-4), question
+    print("✅ Batched rows match per-pair embeddings")
+    
+    # Question and answer must not be swapped or misaligned within the batch
+    shuffled = service.embed_qa_pairs(questions[::-1], answers[::-1])
+    assert np.allclose(shuffled[::-1], embeddings, atol=1e-4), "row order depends on batch position"
+    print("✅ Rows follow their input order")
+
+if __name__ == "__main__":
+    try:
+        test_embed_qa_pairs_matches_individual_embeddings()
+    except AssertionError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    
+    print("\n✅ QA pair embedding checks passed")
@@ -1,3 +1,9 @@
+from dataclasses import dataclass
+from functools import lru_cache
+from datetime import date, datetime, timedelta
+from types import MappingProxyType
+from typing import Iterable, List, Mapping, Optional, Tuple
+
 TREATMENT_TYPES = {
     "cleaning": {
         "name": "Dental Cleaning",
@@ -61,12 +67,116 @@ TREATMENT_TYPES = {
     }
 }
 
+@dataclass(frozen=True, slots=True)
+class TreatmentInfo:
+    """Treatment metadata with defaults already applied"""
+    name: str
+    duration: int  # minutes
+    price: float
+
+# Read-only view of TREATMENT_TYPES built once at import, for hot paths that
+# only need name/duration/price
+TREATMENTS: Mapping[str, TreatmentInfo] = MappingProxyType({
+    key: TreatmentInfo(
+        name=info.get("name", key),
+        duration=info.get("duration", 60),
+        price=info.get("price", 0)
+    )
+    for key, info in TREATMENT_TYPES.items()
+})
+
+# Treatment keys and durations for validation errors and slot/calendar math
+VALID_TREATMENT_TYPES = tuple(TREATMENT_TYPES)
+VALID_TREATMENT_TYPE_SET = frozenset(TREATMENT_TYPES)
+TREATMENT_DURATIONS: Mapping[str, int] = MappingProxyType({
+    key: info['duration'] for key, info in TREATMENT_TYPES.items()
+})
+
+def get_treatment_info(treatment_type: str) -> TreatmentInfo:
+    """Look up treatment metadata, falling back to a 60-minute, zero-price entry"""
+    info = TREATMENTS.get(treatment_type)
+    if info is None:
+        info = TreatmentInfo(name=treatment_type, duration=60, price=0)
+    return info
+
+def parse_appointment_datetime(appointment_date: Optional[date], appointment_time: str) -> Optional[datetime]:
+    """Combine the stored date and "HH:MM" time string, or None if either is missing or malformed"""
+    minutes = time_to_minutes(appointment_time)
+    if appointment_date is None or minutes is None:
+        return None
+    return datetime(appointment_date.year, appointment_date.month, appointment_date.day) + timedelta(minutes=minutes)
+
 # Available time slots (24-hour format)
 AVAILABLE_TIME_SLOTS = [
     "09:00", "09:30", "10:00", "10:30", "11:00", "11:30",
     "14:00", "14:30", "15:00", "15:30", "16:00", "16:30", "17:00"
 ]
 
+# Minutes since midnight of each slot, parsed once at import
+SLOT_MINUTES: Mapping[str, int] = MappingProxyType({
+    slot: int(slot[:2]) * 60 + int(slot[3:])
+    for slot in AVAILABLE_TIME_SLOTS
+})
+
+def time_to_minutes(value: str) -> Optional[int]:
+    """Minutes since midnight for an "HH:MM" time string, or None if malformed"""
+    minutes = SLOT_MINUTES.get(value)
+    if minutes is not None:
+        return minutes
+    try:
+        hours, mins = value.split(":")
+        hours, mins = int(hours), int(mins)
+    except (AttributeError, ValueError):
+        return None
+    if not (0 <= hours < 24 and 0 <= mins < 60):
+        return None
+    return hours * 60 + mins
+
+# Slot availability is computed on a grid of 30-minute periods (bit i = minutes [30i, 30i + 30))
+SLOT_LENGTH_MINUTES = 30
+
+# Grid position of each bookable slot, in AVAILABLE_TIME_SLOTS order
+SLOT_INDEX: Mapping[str, int] = MappingProxyType({
+    slot: minutes // SLOT_LENGTH_MINUTES
+    for slot, minutes in SLOT_MINUTES.items()
+})
+
+# Bitmask of the periods that can be booked at all (the lunch break is unset)
+BOOKABLE_SLOT_MASK = sum(1 << index for index in SLOT_INDEX.values())
+
+def period_mask(start_minutes: int, duration: int) -> int:
+    """Bitmask of the 30-minute periods overlapped by [start, start + duration)"""
+    first = start_minutes // SLOT_LENGTH_MINUTES
+    periods = -(-(start_minutes % SLOT_LENGTH_MINUTES + duration) // SLOT_LENGTH_MINUTES)
+    return ((1 << periods) - 1) << first
+
+@lru_cache(maxsize=None)
+def bookable_slot_masks(duration: int) -> Tuple[Tuple[str, int], ...]:
+    """(slot, period mask) for every slot where a treatment of this length stays within bookable periods"""
+    masks = []
+    for slot, index in SLOT_INDEX.items():
+        needed = period_mask(index * SLOT_LENGTH_MINUTES, duration)
+        if needed & BOOKABLE_SLOT_MASK == needed:
+            masks.append((slot, needed))
+    return tuple(masks)
+
+def find_available_slots(duration: int, booked: Iterable[Tuple[str, int]]) -> List[str]:
+    """Slots where a treatment of this length fits around booked (start time, duration) appointments"""
+    # Mark every 30-minute period overlapped by an existing appointment
+    blocked = 0
+    
+    for appointment_time, appointment_duration in booked:
+        start_minutes = time_to_minutes(appointment_time)
+        if start_minutes is None:
+            # Skip invalid time formats
+            continue
+        
+        blocked |= period_mask(start_minutes, appointment_duration)
+    
+    # A slot is available if every period the treatment needs is bookable and free
+    # (e.g., don't book a 90-minute appointment at 11:30 that runs into lunch)
+    return [slot for slot, needed in bookable_slot_masks(duration) if not needed & blocked]
+
 # Business hours
 BUSINESS_HOURS = {
     "start": "09:00",
@@ -1,11 +1,12 @@
 import os
-import json
+import orjson
 import pickle
 import numpy as np
 from typing import List, Dict, Optional, Tuple
 import faiss
 from sqlalchemy.orm import Session
 import logging
+import threading
 from datetime import datetime
 
 from models import KnowledgeBase, VectorSearchLog
@@ -28,6 +29,11 @@ class VectorSearchEngine:
         self.id_mapping = {}  # Maps FAISS index positions to KnowledgeBase IDs
         self.index_path = "faiss_index.bin"
         self.mapping_path = "id_mapping.pkl"
+        # Indexes are built into locals and swapped in under _index_lock, so
+        # searches never see a half-built index; _build_lock keeps the startup
+        # warmup and request-time initialization from building twice
+        self._index_lock = threading.Lock()
+        self._build_lock = threading.RLock()
         
         logger.info(f"VectorSearchEngine initialized with {self.dimension}-dimensional embeddings")
         
@@ -35,64 +41,30 @@ class VectorSearchEngine:
         """Initialize FAISS index with existing knowledge base entries"""
         with ExceptionHandler("initialize_index"):
             try:
-                # Check if we need to rebuild index due to dimension mismatch
-                if os.path.exists(self.index_path) and os.path.exists(self.mapping_path):
-                    try:
-                        self.load_index()
-                        # Verify dimension compatibility
-                        if self.index.d != self.dimension:
-                            logger.warning(f"Index dimension mismatch. Expected {self.dimension}, got {self.index.d}. Rebuilding index.")
-                            return self.rebuild_index(db)
-                        logger.info(f"Loaded existing FAISS index with {self.index.ntotal} vectors")
-                        return True
-                    except Exception as e:
-                        logger.warning(f"Failed to load existing index: {e}. Creating new index.")
-                
-                # Create new index
-                logger.info(f"Creating new FAISS index with dimension {self.dimension}")
-                self.index = faiss.IndexFlatIP(self.dimension)  # Inner product (cosine similarity)
-                self.id_mapping = {}
-                
-                # Load all active knowledge base entries
-                kb_entries = db.query(KnowledgeBase).filter(KnowledgeBase.is_active == True).all()
-                
-                if not kb_entries:
-                    logger.warning("No knowledge base entries found for indexing")
-                    self.save_index()  # Save empty index
-                    return True
-                
-                # Prepare embeddings
-                embeddings = []
-                valid_entries = []
-                
-                for i, entry in enumerate(kb_entries):
-                    embedding = self.embeddings_service.get_embedding_from_db(entry)
-                    if embedding and len(embedding) == self.dimension:
-                        embeddings.append(embedding)
-                        valid_entries.append(entry)
-                        self.id_mapping[len(embeddings) - 1] = entry.id
-                    else:
-                        if not embedding:
-                            logger.warning(f"No embedding found for KB entry {entry.id}")
-                        else:
-                            logger.warning(f"Dimension mismatch for KB entry {entry.id}. Expected {self.dimension}, got {len(embedding)}")
-                
-                if embeddings:
-                    # Convert to numpy array and normalize for cosine similarity
-                    embeddings_array = np.array(embeddings, dtype=np.float32)
-                    faiss.normalize_L2(embeddings_array)
-                    
-                    # Add to index
-                    self.index.add(embeddings_array)
+                with self._build_lock:
+                    # Check if we need to rebuild index due to dimension mismatch
+                    if os.path.exists(self.index_path) and os.path.exists(self.mapping_path):
+                        try:
+                            index, id_mapping = self._read_index_files()
+                            # Verify dimension compatibility
+                            if index.d != self.dimension:
+                                logger.warning(f"Index dimension mismatch. Expected {self.dimension}, got {index.d}. Rebuilding index.")
+                                return self.rebuild_index(db)
+                            self._swap_index(index, id_mapping)
+                            logger.info(f"Loaded existing FAISS index with {index.ntotal} vectors")
+                            return True
+                        except Exception as e:
+                            logger.warning(f"Failed to load existing index: {e}. Creating new index.")
                     
-                    # Save index
+                    # Create new index
+                    logger.info(f"Creating new FAISS index with dimension {self.dimension}")
+                    index, id_mapping = self._build_index(db)
+                    self._swap_index(index, id_mapping)
                     self.save_index()
                     
-                    logger.info(f"Initialized FAISS index with {len(embeddings)} entries")
-                else:
-                    logger.warning("No valid embeddings found for indexing")
-                
-                return True
+                    if index.ntotal:
+                        logger.info(f"Initialized FAISS index with {index.ntotal} entries")
+                    return True
                 
             except Exception as e:
                 logger.error(f"Error initializing index: {e}")
@@ -107,7 +79,7 @@ class VectorSearchEngine:
                 
                 # Get embedding
                 embedding = self.embeddings_service.get_embedding_from_db(kb_entry)
-                if not embedding:
+                if embedding is None:
                     raise VectorSearchException(f"No embedding found for KB entry {kb_entry.id}")
                 
                 # Validate dimension
@@ -116,16 +88,16 @@ class VectorSearchEngine:
                         f"Dimension mismatch for KB entry {kb_entry.id}. Expected {self.dimension}, got {len(embedding)}"
                     )
                 
-                # Normalize embedding
+                # Normalize embedding if it was stored before vectors were pre-normalized
                 embedding_array = np.array([embedding], dtype=np.float32)
-                faiss.normalize_L2(embedding_array)
-                
-                # Add to index
-                current_size = self.index.ntotal
-                self.index.add(embedding_array)
+                if not kb_entry.embedding_normalized:
+                    faiss.normalize_L2(embedding_array)
                 
-                # Update mapping
-                self.id_mapping[current_size] = kb_entry.id
+                # Add to index and update mapping together so searches see both or neither
+                with self._index_lock:
+                    current_size = self.index.ntotal
+                    self.index.add(embedding_array)
+                    self.id_mapping[current_size] = kb_entry.id
                 
                 # Save updated index
                 self.save_index()
@@ -171,7 +143,9 @@ class VectorSearchEngine:
                 if not self.index:
                     logger.warning("Vector search index not initialized. Attempting auto-initialization...")
                     if db:
-                        success = self.initialize_index(db)
+                        # Waits for an initialization already in progress (e.g. the startup warmup)
+                        with self._build_lock:
+                            success = bool(self.index) or self.initialize_index(db)
                         if not success:
                             raise VectorSearchException("Vector search index not initialized and auto-initialization failed")
                     else:
@@ -191,12 +165,15 @@ class VectorSearchEngine:
                         f"Query embedding dimension mismatch. Expected {self.dimension}, got {len(query_embedding)}"
                     )
                 
-                # Normalize embedding for cosine similarity
+                # Query embeddings are generated unit length, so inner product is cosine similarity
                 query_array = np.array([query_embedding], dtype=np.float32)
-                faiss.normalize_L2(query_array)
+                
+                # Search a consistent snapshot; a rebuild may swap in a new index meanwhile
+                with self._index_lock:
+                    index, id_mapping = self.index, self.id_mapping
                 
                 # Perform vector search
-                scores, indices = self.index.search(query_array, min(k, self.index.ntotal))
+                scores, indices = index.search(query_array, min(k, index.ntotal))
                 
                 # Process results
                 results = []
@@ -208,7 +185,7 @@ class VectorSearchEngine:
                         logger.debug(f"Filtering result with score {score} below threshold {threshold}")
                         continue
                     
-                    kb_id = self.id_mapping.get(idx)
+                    kb_id = id_mapping.get(idx)
                     if kb_id:
                         results.append({
                             'kb_id': kb_id,
@@ -280,8 +257,8 @@ class VectorSearchEngine:
                 session_id=session_id,
                 query=query,
                 top_k=k,
-                similarity_scores=json.dumps(similarity_scores),
-                matched_kb_ids=json.dumps(kb_ids),
+                similarity_scores=orjson.dumps(similarity_scores, option=orjson.OPT_SERIALIZE_NUMPY).decode(),
+                matched_kb_ids=orjson.dumps(kb_ids, option=orjson.OPT_SERIALIZE_NUMPY).decode(),
                 search_time_ms=search_time_ms
             )
             
@@ -296,64 +273,85 @@ class VectorSearchEngine:
         try:
             logger.info("Rebuilding FAISS index from scratch")
             
-            # Clear existing index and mapping
-            self.index = faiss.IndexFlatIP(self.dimension)
-            self.id_mapping = {}
-            
-            # Load all active knowledge base entries
-            kb_entries = db.query(KnowledgeBase).filter(KnowledgeBase.is_active == True).all()
-            
-            if not kb_entries:
-                logger.warning("No active knowledge base entries found")
-                self.save_index()  # Save empty index
-                return True
-            
-            # Prepare embeddings
-            embeddings = []
-            valid_entries = []
-            
-            for i, entry in enumerate(kb_entries):
-                embedding = self.embeddings_service.get_embedding_from_db(entry)
-                if embedding and len(embedding) == self.dimension:
-                    embeddings.append(embedding)
-                    valid_entries.append(entry)
-                    self.id_mapping[len(embeddings) - 1] = entry.id
-                else:
-                    if not embedding:
-                        logger.warning(f"No embedding found for KB entry {entry.id}")
-                    else:
-                        logger.warning(f"Dimension mismatch for KB entry {entry.id}. Expected {self.dimension}, got {len(embedding)}")
-            
-            if embeddings:
-                # Convert to numpy array and normalize for cosine similarity
-                embeddings_array = np.array(embeddings, dtype=np.float32)
-                faiss.normalize_L2(embeddings_array)
-                
-                # Add to index
-                self.index.add(embeddings_array)
-                
-                # Save index
+            with self._build_lock:
+                # Build alongside the live index and swap once complete
+                index, id_mapping = self._build_index(db)
+                self._swap_index(index, id_mapping)
                 self.save_index()
-                
-                logger.info(f"Rebuilt FAISS index with {len(embeddings)} entries")
-            else:
-                logger.warning("No valid embeddings found for indexing")
-                self.save_index()  # Save empty index
             
+            if index.ntotal:
+                logger.info(f"Rebuilt FAISS index with {index.ntotal} entries")
             return True
             
         except Exception as e:
             logger.error(f"Error rebuilding index: {e}")
             return False
     
+    def _build_index(self, db: Session) -> Tuple[faiss.Index, Dict[int, int]]:
+        """Build a FAISS index and ID mapping from the active knowledge base entries"""
+        index = faiss.IndexFlatIP(self.dimension)  # Inner product (cosine similarity)
+        id_mapping = {}
+        
+        # Load all active knowledge base entries
+        kb_entries = db.query(KnowledgeBase).filter(KnowledgeBase.is_active == True).all()
+        
+        if not kb_entries:
+            logger.warning("No active knowledge base entries found for indexing")
+            return index, id_mapping
+        
+        # Prepare embeddings
+        embeddings = []
+        valid_entries = []
+        
+        for entry in kb_entries:
+            embedding = self.embeddings_service.get_embedding_from_db(entry)
+            if embedding is not None and len(embedding) == self.dimension:
+                embeddings.append(embedding)
+                valid_entries.append(entry)
+                id_mapping[len(embeddings) - 1] = entry.id
+            else:
+                if embedding is None:
+                    logger.warning(f"No embedding found for KB entry {entry.id}")
+                else:
+                    logger.warning(f"Dimension mismatch for KB entry {entry.id}. Expected {self.dimension}, got {len(embedding)}")
+        
+        if embeddings:
+            # Convert to numpy array; only legacy vectors still need normalizing for cosine similarity
+            embeddings_array = np.array(embeddings, dtype=np.float32)
+            if not all(entry.embedding_normalized for entry in valid_entries):
+                faiss.normalize_L2(embeddings_array)
+            
+            index.add(embeddings_array)
+        else:
+            logger.warning("No valid embeddings found for indexing")
+        
+        return index, id_mapping
+    
+    def _swap_index(self, index: faiss.Index, id_mapping: Dict[int, int]):
+        """Publish a fully built index and its ID mapping to searches"""
+        with self._index_lock:
+            self.index, self.id_mapping = index, id_mapping
+    
+    def _read_index_files(self) -> Tuple[faiss.Index, Dict[int, int]]:
+        """Read the FAISS index and ID mapping from disk"""
+        index = faiss.read_index(self.index_path)
+        
+        with open(self.mapping_path, 'rb') as f:
+            id_mapping = pickle.load(f)
+        
+        return index, id_mapping
+    
     def save_index(self):
         """Save FAISS index and ID mapping to disk"""
         try:
-            if self.index:
-                faiss.write_index(self.index, self.index_path)
+            with self._index_lock:
+                index, id_mapping = self.index, dict(self.id_mapping)
+            
+            if index:
+                faiss.write_index(index, self.index_path)
                 
                 with open(self.mapping_path, 'wb') as f:
-                    pickle.dump(self.id_mapping, f)
+                    pickle.dump(id_mapping, f)
                 
                 logger.debug("FAISS index saved to disk")
             
@@ -364,12 +362,10 @@ class VectorSearchEngine:
         """Load FAISS index and ID mapping from disk"""
         try:
             if os.path.exists(self.index_path) and os.path.exists(self.mapping_path):
-                self.index = faiss.read_index(self.index_path)
-                
-                with open(self.mapping_path, 'rb') as f:
-                    self.id_mapping = pickle.load(f)
+                index, id_mapping = self._read_index_files()
+                self._swap_index(index, id_mapping)
                 
-                logger.info(f"FAISS index loaded with {self.index.ntotal} entries")
+                logger.info(f"FAISS index loaded with {index.ntotal} entries")
             
         except Exception as e:
             logger.error(f"Error loading index: {e}")
@@ -394,10 +390,13 @@ class VectorSearchEngine:
 
 # Global instance
 _vector_search_engine = None
+_vector_search_engine_lock = threading.Lock()
 
 def get_vector_search_engine() -> VectorSearchEngine:
     """Get global vector search engine instance"""
     global _vector_search_engine
     if _vector_search_engine is None:
-        _vector_search_engine = VectorSearchEngine()
+        with _vector_search_engine_lock:
+            if _vector_search_engine is None:
+                _vector_search_engine = VectorSearchEngine()
     return _vector_search_engine
\ No newline at end of file
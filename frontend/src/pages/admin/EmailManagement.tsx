@@ -133,8 +133,24 @@ const EmailManagement: React.FC = () => {
       });
 
       if (response.ok) {
-        const result = await response.json();
-        alert(`Test email sent successfully! Subject: ${result.subject}`);
+        const { task_id } = await response.json();
+
+        // The send runs in the background; poll until it finishes
+        let result = { status: 'pending', subject: '', error: '' };
+        for (let attempt = 0; attempt < 30 && result.status === 'pending'; attempt++) {
+          await new Promise(resolve => setTimeout(resolve, 2000));
+          const statusResponse = await fetch(`${API_BASE_URL}/api/email/send-test/${task_id}`);
+          if (!statusResponse.ok) break;
+          result = await statusResponse.json();
+        }
+
+        if (result.status === 'sent') {
+          alert(`Test email sent successfully! Subject: ${result.subject}`);
+        } else if (result.status === 'pending') {
+          alert('Test email is still being processed');
+        } else {
+          alert('Failed to send test email');
+        }
       } else {
         alert('Failed to send test email');
       }